@@ -4,48 +4,246 @@ Kakanai v2 - FastAPI Backend
 """
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import os
+import re
 from dotenv import load_dotenv
 import uuid
-import json
+import asyncio
+import logging
+import orjson
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+import anyio
+from urllib.parse import quote
+from google.auth.transport.requests import Request as GoogleAuthRequest
 
 # Load environment variables
 load_dotenv()
 
+from utils.log_config import setup_logging, stop_logging
+setup_logging()
+logger = logging.getLogger("kakanai")
+
 # Import services
-from services.ai_service import AIService
+from services.ai_service import AIService, PartialAssessmentError, prompt_definitions
 from services.sheets_service import SheetsService
 from services.storage_service import StorageService
 from services.drive_service import drive_service
-import io
 from services.csv_service import csv_service
-from fastapi.responses import Response, StreamingResponse
+from services.llm_cache import llm_cache, make_cache_key
+from utils.mime_utils import resolve_mime
+from fastapi.responses import Response, StreamingResponse, ORJSONResponse
+
+APP_VERSION = "2.1.0"
+
+# ブロッキング処理を逃がすワーカースレッド数（既定の min(32, CPU+4) / 40 では同時アップロードで詰まる）
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "64"))
+
+# Services (lifespan で初期化)
+ai_service: Optional[AIService] = None
+sheets_service: Optional[SheetsService] = None
+storage_service: Optional[StorageService] = None
+
+
+# プロセス内で1インスタンスのみ生成（HTTP接続プール・認証情報を全リクエストで共有）
+@lru_cache(maxsize=1)
+def get_ai_service() -> AIService:
+    return AIService()
+
+
+@lru_cache(maxsize=1)
+def get_sheets_service() -> SheetsService:
+    return SheetsService()
+
+
+@lru_cache(maxsize=1)
+def get_storage_service() -> StorageService:
+    return StorageService()
+
+
+def _warmup_storage():
+    """R2へのTLS接続を事前に確立"""
+    if storage_service.s3_client:
+        storage_service.s3_client.head_bucket(Bucket=storage_service.bucket_name)
+
+
+def _warmup_ai():
+    """Geminiクライアントを事前に初期化"""
+    ai_service.warmup()
+
+
+def _warmup_google():
+    """Google APIのアクセストークンを事前に取得"""
+    if drive_service.creds:
+        drive_service.creds.refresh(GoogleAuthRequest())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    起動時にサービスを初期化し、外部クライアントを並列でウォームアップ
+    （初回リクエストで認証・TLSハンドシェイクのコストを払わないようにする）
+    """
+    global ai_service, sheets_service, storage_service
+    # ブロッキングI/O（R2 / Google API / Gemini）用のスレッド数を拡張
+    # asyncio.to_thread はループの既定Executor、同期BackgroundTasksはanyioのスレッドプールを使う
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=THREADPOOL_SIZE, thread_name_prefix="kakanai-io")
+    )
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+    ai_service, sheets_service, storage_service = await asyncio.gather(
+        asyncio.to_thread(get_ai_service),
+        asyncio.to_thread(get_sheets_service),
+        asyncio.to_thread(get_storage_service),
+    )
+    app.state.ai = ai_service
+    app.state.sheets = sheets_service
+    app.state.storage = storage_service
+
+    warmups = await asyncio.gather(
+        asyncio.to_thread(_warmup_storage),
+        asyncio.to_thread(_warmup_google),
+        asyncio.to_thread(_warmup_ai),
+        return_exceptions=True
+    )
+    for warmup_result in warmups:
+        if isinstance(warmup_result, Exception):
+            logger.warning("Warmup skipped: %s", warmup_result)
+    yield
+    # 未完了のDrive保存などを待ってから終了
+    if _detached_tasks:
+        await asyncio.wait(set(_detached_tasks), timeout=30)
+    stop_logging()
+
+
+class KakanaiJSONResponse(ORJSONResponse):
+    """
+    orjsonでシリアライズするレスポンス
+    標準のjsonと同様に数値キーのdict（シートの行番号など）も文字列キーとして出力する
+    """
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
 
 app = FastAPI(
     title="Kakanai API",
     description="介護業務DX バックエンドAPI",
-    version="2.1.0"
+    version=APP_VERSION,
+    lifespan=lifespan,
+    default_response_class=KakanaiJSONResponse
 )
 
+# アップロードサイズ上限（バイト）
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+UPLOAD_READ_CHUNK = 1024 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Content-Length が上限を超えるリクエストを本文を読む前に413で拒否する
+    （FastAPIはDependsの実行前にmultipartを解析するため、ASGIレベルで判定）
+    本文は分析系と同じ {success, error} の形で返す（フロントエンドは error を表示する）
+    """
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    if value.isdigit() and int(value) > self.max_bytes:
+                        response = _analyze_json(
+                            success=False,
+                            error=f"Upload too large (max {self.max_bytes} bytes)",
+                            status_code=413
+                        )
+                        await response(scope, receive, send)
+                        return
+                    break
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=MAX_UPLOAD_BYTES)
+
+
+# 圧縮対象外のパス
+# - NDJSONストリーム: 圧縮バッファで行がまとめられ、逐次表示できなくなるため
+# - Excel変換: xlsx は既にzip圧縮済み
+COMPRESSION_EXCLUDED_PATHS = frozenset([
+    "/api/analyze/direct/stream",
+    "/api/csv/convert",
+])
+COMPRESSION_MIN_SIZE = 1024
+
+
+class KakanaiCompressionMiddleware:
+    """
+    分析結果などの大きなJSON（日本語テキスト）を圧縮する
+    brotli-asgi があれば Brotli（quality=4、br非対応クライアントにはgzip）、なければgzip
+    """
+    def __init__(self, app):
+        self.app = app
+        if BrotliMiddleware:
+            self.compressed_app = BrotliMiddleware(
+                app, quality=4, minimum_size=COMPRESSION_MIN_SIZE, gzip_fallback=True
+            )
+        else:
+            self.compressed_app = GZipMiddleware(app, minimum_size=COMPRESSION_MIN_SIZE, compresslevel=5)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in COMPRESSION_EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await self.compressed_app(scope, receive, send)
+
+
+app.add_middleware(KakanaiCompressionMiddleware)
+
 # CORS設定
+ALLOWED_ORIGINS = frozenset([
+    "http://localhost:3000",
+    "https://kakanai-kiyoraka.vercel.app",
+])
+# Vercelのプレビュー用サブドメイン（1階層のみ）
+ALLOWED_ORIGIN_RE = re.compile(r"https://[a-z0-9-]+\.vercel\.app")
+
+
+class KakanaiCORSMiddleware(CORSMiddleware):
+    """許可オリジン判定を frozenset + コンパイル済み正規表現で行う"""
+    def is_allowed_origin(self, origin: str) -> bool:
+        return origin in ALLOWED_ORIGINS or ALLOWED_ORIGIN_RE.fullmatch(origin) is not None
+
+
+# 413等のエラー応答にもCORSヘッダーを付けるため最後に追加（＝最外側）
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",
-        "https://kakanai-kiyoraka.vercel.app",
-    ],
-    allow_origin_regex=r"https://.*\.vercel\.app",
+    KakanaiCORSMiddleware,
+    allow_origins=list(ALLOWED_ORIGINS),
+    allow_origin_regex=ALLOWED_ORIGIN_RE.pattern,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
+    # CSV変換のファイル名・キャッシュ状態をフロントから読めるようにする
+    expose_headers=["Content-Disposition", "X-Cache"],
+    # プリフライト結果をブラウザに1日キャッシュさせる
+    max_age=86400,
 )
 
-# Services initialization
-ai_service = AIService()
-sheets_service = SheetsService()
-storage_service = StorageService()
+# バックエンド経由アップロード（/api/upload/direct）はCORS障害時のフォールバックのみ
+# 通常はブラウザから署名付きURLでR2へ直接PUTする
+ENABLE_DIRECT_UPLOAD = os.getenv("ENABLE_DIRECT_UPLOAD", "").lower() in ("1", "true", "yes")
+
+# R2からの同時取得数（1リクエストあたり）
+R2_FETCH_CONCURRENCY = 8
 
 
 # --- Request/Response Models ---
@@ -118,97 +316,277 @@ class BodyMapRequest(BaseModel):
     text: str
 
 
-# --- Background Tasks ---
+# --- Gemini Concurrency ---
+
+# ワーカーごとのGemini同時分析数の上限（超えた分は待機させ、429→リトライの連鎖を防ぐ）
+# アセスメントは1件で内部的に13フェーズを並列実行するため、1分析=1枠として数える
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "4"))
+# 枠が空くまでの最大待ち時間（秒）。超えたら503で早めに返し、クライアント側で再試行させる
+GEMINI_QUEUE_TIMEOUT = float(os.getenv("GEMINI_QUEUE_TIMEOUT", "120"))
+gemini_semaphore = asyncio.Semaphore(GEMINI_CONCURRENCY)
 
-def run_background_generation(text_data: str, genogram_id: str, bodymap_id: str):
+
+async def _acquire_gemini_slot():
+    """Gemini同時実行枠を1つ確保する（GEMINI_QUEUE_TIMEOUT秒以内に空かなければ503）"""
+    try:
+        await asyncio.wait_for(gemini_semaphore.acquire(), timeout=GEMINI_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="AI analysis is busy. Please retry later.")
+
+
+@asynccontextmanager
+async def gemini_slot():
     """
-    バックグラウンドでジェノグラムと身体図のデータを生成し、R2に保存する
+    Gemini同時実行枠を確保する
+    実行中の分析はスレッド上で中断できないため、タイムアウトは枠待ちにのみ適用する
+    同期関数をスレッドで実行する場合は run_in_gemini_slot を使う（キャンセル時も枠を保持する）
     """
-    print(f"Background: Starting generation for IDs {genogram_id}, {bodymap_id}", flush=True)
+    await _acquire_gemini_slot()
     try:
-        # 1. Genogram Generation
-        if genogram_id:
-            try:
-                print("Background: Generating Genogram...", flush=True)
-                genogram_data = ai_service.generate_genogram_data(text_data)
-                # Save to R2 with specific key (drafts/{id}.json)
-                key = f"drafts/{genogram_id}.json"
-                json_bytes = json.dumps(genogram_data, ensure_ascii=False).encode("utf-8")
-                
-                # Use storage_service.s3_client directly to control key
-                if storage_service.s3_client:
-                    storage_service.s3_client.put_object(
-                        Bucket=storage_service.bucket_name,
-                        Key=key,
-                        Body=json_bytes,
-                        ContentType="application/json"
-                    )
-                    print(f"Background: Genogram draft saved to {key}", flush=True)
-            except Exception as e:
-                print(f"Background Error (Genogram): {e}", flush=True)
+        yield
+    finally:
+        gemini_semaphore.release()
 
-        # 2. BodyMap Generation
-        if bodymap_id:
-            try:
-                print("Background: Generating BodyMap...", flush=True)
-                bodymap_data = ai_service.generate_bodymap_data(text_data)
-                # Save to R2
-                key = f"drafts/{bodymap_id}.json"
-                json_bytes = json.dumps(bodymap_data, ensure_ascii=False).encode("utf-8")
-                
-                if storage_service.s3_client:
-                    storage_service.s3_client.put_object(
-                        Bucket=storage_service.bucket_name,
-                        Key=key,
-                        Body=json_bytes,
-                        ContentType="application/json"
-                    )
-                    print(f"Background: BodyMap draft saved to {key}", flush=True)
-            except Exception as e:
-                print(f"Background Error (BodyMap): {e}", flush=True)
 
+# --- Detached Task Helpers ---
+
+# 実行中のバックグラウンドタスク（イベントループは弱参照しか持たないためGC対策で保持）
+_detached_tasks: set = set()
+
+
+def _on_detached_done(task: asyncio.Task):
+    _detached_tasks.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.error("Detached task %s failed: %s", task.get_name(), task.exception())
+
+
+def _spawn_detached(func, *args, name: Optional[str] = None) -> asyncio.Task:
+    """同期関数をスレッドで実行し、レスポンスを待たせずに完了させる"""
+    task = asyncio.create_task(asyncio.to_thread(func, *args), name=name)
+    _detached_tasks.add(task)
+    task.add_done_callback(_on_detached_done)
+    return task
+
+
+def _on_slot_task_done(task: asyncio.Task):
+    _detached_tasks.discard(task)
+    # 呼び出し元がキャンセル済みで結果を受け取らない場合も、例外を取得済みにして警告を出さない
+    if not task.cancelled():
+        task.exception()
+
+
+async def run_in_gemini_slot(func, *args):
+    """
+    Gemini同時実行枠を確保して同期関数をスレッドで実行する
+    呼び出し元がキャンセルされても（ストリームのクライアント切断など）スレッドは止められないため、
+    スレッドが終わるまで枠を解放しない（先に解放すると同時実行数の上限を超えてGeminiを呼んでしまう）
+    """
+    await _acquire_gemini_slot()
+
+    async def _run_then_release():
+        try:
+            return await asyncio.to_thread(func, *args)
+        finally:
+            gemini_semaphore.release()
+
+    task = asyncio.create_task(_run_then_release())
+    _detached_tasks.add(task)
+    task.add_done_callback(_on_slot_task_done)
+    return await asyncio.shield(task)
+
+
+# --- Response Helpers ---
+
+def _analyze_json(
+    success: bool,
+    data: Optional[Dict[str, Any]] = None,
+    error: Optional[str] = None,
+    genogram_draft_id: Optional[str] = None,
+    bodymap_draft_id: Optional[str] = None,
+    cache_status: Optional[str] = None,
+    status_code: int = 200
+) -> KakanaiJSONResponse:
+    """
+    AnalyzeResponse と同じ形のJSONを直接返す
+    （AI結果の巨大なdictに対する response_model 検証・jsonable_encoder をスキップ）
+    エラー時も同じ形で返し、status_code で 503 / 413 などを伝える
+    """
+    content = {
+        "success": success,
+        "data": data,
+        "error": error,
+        "genogram_draft_id": genogram_draft_id,
+        "bodymap_draft_id": bodymap_draft_id,
+    }
+    headers = {"X-Cache": cache_status} if cache_status else None
+    return KakanaiJSONResponse(content, status_code=status_code, headers=headers)
+
+
+def _analyze_http_error(e: HTTPException) -> KakanaiJSONResponse:
+    """
+    HTTPException（503: 同時実行上限、413: サイズ超過など）をステータスコードを保ったまま AnalyzeResponse の形で返す
+    （フロントエンドは分析系のレスポンス本文の error を表示するため、{"detail": ...} にしない）
+    """
+    return _analyze_json(success=False, error=str(e.detail), status_code=e.status_code)
+
+
+# スキーマ(OpenAPI)表示用
+ANALYZE_RESPONSES = {200: {"model": AnalyzeResponse}}
+
+
+# --- LLM Cache Helpers ---
+
+# プロンプト定義（ai_service.prompt_definitions）とマッピング定義の内容から算出するバージョン
+# これらを変更してデプロイすると自動的に旧キャッシュを使わなくなる（ai_service.py のその他の変更では変わらない）
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_MAPPING_SOURCES = [
+    os.path.join(_BASE_DIR, "config", "mapping.txt"),
+    os.path.join(_BASE_DIR, "config", "mapping2.txt"),
+]
+
+
+def _prompt_version() -> str:
+    parts = prompt_definitions()
+    for path in _MAPPING_SOURCES:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                parts.append(f.read())
+    return make_cache_key(*parts)[:16]
+
+
+PROMPT_VERSION = _prompt_version()
+
+
+def _analysis_cache_key(analysis_type: str, file_contents: List[tuple]) -> str:
+    """モデル名・プロンプトバージョン・分析タイプ・ファイル内容(MIME含む)からキャッシュキーを生成"""
+    parts = [ai_service.model_name, PROMPT_VERSION, analysis_type]
+    for content, mime_type in file_contents:
+        parts.append(mime_type)
+        parts.append(content)
+    return make_cache_key(*parts)
+
+
+# --- Analysis Dispatch ---
+
+# 分析タイプ → AIServiceのメソッド名（未知のタイプはアセスメント扱い）
+ANALYSIS_METHODS = {
+    "assessment": "extract_assessment_info",
+    "management_meeting": "generate_management_meeting_summary",
+    "service_meeting": "generate_service_meeting_summary",
+    "meeting": "generate_meeting_summary",
+    "qa": "extract_qa_from_audio",
+}
+
+
+async def _run_cached_analysis(analysis_type: str, file_contents: List[tuple]) -> Tuple[Any, str]:
+    """
+    分析タイプに応じたAI分析（キャッシュ・同時実行数制限付き）
+    Returns: (result, "HIT"/"MISS")
+    """
+    cache_key = _analysis_cache_key(analysis_type, file_contents)
+    result = await llm_cache.get(cache_key)
+    if result is not None:
+        return result, "HIT"
+
+    method = getattr(ai_service, ANALYSIS_METHODS.get(analysis_type, "extract_assessment_info"))
+    try:
+        # アセスメントは内部で並列実行するasync実装（キャンセルで中断できる）、その他は同期実装
+        if asyncio.iscoroutinefunction(method):
+            async with gemini_slot():
+                result = await method(file_contents)
+        else:
+            result = await run_in_gemini_slot(method, file_contents)
+    except PartialAssessmentError as e:
+        # 一部フェーズの失敗: 成功分は返すが、再試行で取り直せるようにキャッシュしない
+        if not e.result:
+            raise
+        logger.warning("Returning partial assessment without caching (failed phases: %s)", e.failed_phases)
+        return e.result, "MISS"
+
+    if result:
+        await llm_cache.set(cache_key, result)
+    return result, "MISS"
+
+
+# --- Background Tasks ---
+
+def _generate_draft(label: str, generate, text_data: str, draft_id: str):
+    """下書きデータを1種類生成してR2に保存する（スレッドで実行）"""
+    try:
+        logger.debug("Background: Generating %s...", label)
+        data = generate(text_data)
+        # Save to R2 with specific key (drafts/{id}.json)
+        key = storage_service.save_draft(draft_id, data)
+        logger.info("Background: %s draft saved to %s", label, key)
     except Exception as e:
-        print(f"Background Critical Error: {e}", flush=True)
+        logger.error("Background Error (%s): %s", label, e)
+
+
+async def run_background_generation(data: Dict[str, Any], genogram_id: str, bodymap_id: str):
+    """
+    バックグラウンドでジェノグラムと身体図のデータを生成し、R2に保存する
+    2つは独立したAI呼び出しのため並列に実行する（先に終わった方から下書き取得可能になる）
+    ※ BackgroundTasks は登録順に1つずつ実行するため、タスクを分けずにここでgatherする
+    分析結果はdictのまま受け取り、プロンプト用テキストへの変換はレスポンス送信後にここで1回だけ行う
+    """
+    logger.info("Background: Starting generation for IDs %s, %s", genogram_id, bodymap_id)
+    text_data = orjson.dumps(data).decode("utf-8")
+    jobs = []
+    if genogram_id:
+        jobs.append(asyncio.to_thread(_generate_draft, "Genogram", ai_service.generate_genogram_data, text_data, genogram_id))
+    if bodymap_id:
+        jobs.append(asyncio.to_thread(_generate_draft, "BodyMap", ai_service.generate_bodymap_data, text_data, bodymap_id))
+    results = await asyncio.gather(*jobs, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error("Background Critical Error: %s", result)
 
 
 # --- Endpoints ---
 
-@app.get("/api/health", response_model=HealthResponse)
+@app.get("/api/health", responses={200: {"model": HealthResponse}})
 async def health_check():
     """ヘルスチェック"""
-    return HealthResponse(status="healthy", version="2.1.0")
+    return KakanaiJSONResponse({"status": "healthy", "version": APP_VERSION})
 
 
 @app.get("/api/draft/{draft_id}")
 async def get_draft(draft_id: str):
     """下書きデータを取得"""
     try:
-        key = f"drafts/{draft_id}.json"
         try:
-            # R2からファイルを取得 (bytes)
-            data_bytes = storage_service.get_file(key)
-            return json.loads(data_bytes.decode("utf-8"))
+            # R2からファイルを取得 (bytes、zstd圧縮はストレージ側で展開済み)
+            # 保存済みのJSONをそのまま返す（パース→再シリアライズしない）
+            # 下書きは一度保存されたら変更されないため、ブラウザにキャッシュさせる（未生成の404はキャッシュしない）
+            data_bytes = await storage_service.get_draft_async(draft_id)
+            return Response(
+                content=data_bytes,
+                media_type="application/json",
+                headers={"Cache-Control": "private, max-age=3600"}
+            )
         except Exception:
             # まだ生成されていないかエラー (404 Not Found)
             raise HTTPException(status_code=404, detail="Draft not found or not ready")
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Get Draft Error: {e}")
+        logger.error("Get Draft Error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/upload/presign", response_model=PresignedUrlResponse)
+@app.post("/api/upload/presign", responses={200: {"model": PresignedUrlResponse}})
 async def get_presigned_url(request: PresignedUrlRequest):
     """
     Cloudflare R2へのダイレクトアップロード用署名付きURL発行
     """
     try:
-        result = storage_service.generate_presigned_url(
+        result = await asyncio.to_thread(
+            storage_service.generate_presigned_url,
             filename=request.filename,
             content_type=request.content_type
         )
-        return PresignedUrlResponse(**result)
+        # {"upload_url", "file_key"} をそのまま返す（モデル構築・再検証を省略）
+        return KakanaiJSONResponse(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -217,16 +595,23 @@ async def get_presigned_url(request: PresignedUrlRequest):
 async def upload_file_direct(file: UploadFile = File(...)):
     """
     バックエンド経由でR2にアップロード（CORSバイパス）
+    非推奨: /api/upload/presign の署名付きURLを使用すること
+    ENABLE_DIRECT_UPLOAD が有効な場合のみ利用可能（無効時は410）
     """
+    if not ENABLE_DIRECT_UPLOAD:
+        raise HTTPException(
+            status_code=410,
+            detail="Direct upload is disabled. Use /api/upload/presign and PUT to the returned URL."
+        )
+
     try:
         # R2設定の確認
         if not storage_service.s3_client:
             raise HTTPException(status_code=500, detail="R2 credentials not configured.")
         
-        content = await file.read()
-        
-        file_key = storage_service.upload_file(
-            file_data=content,
+        file_key = await asyncio.to_thread(
+            storage_service.upload_file,
+            file_obj=file.file,
             filename=file.filename,
             content_type=file.content_type or "application/octet-stream"
         )
@@ -237,7 +622,7 @@ async def upload_file_direct(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/analyze/audio", response_model=AnalyzeResponse)
+@app.post("/api/analyze/audio", responses=ANALYZE_RESPONSES)
 async def analyze_audio(request: AnalyzeAudioRequest, background_tasks: BackgroundTasks):
     """
     R2経由の分析（複数ファイル対応）
@@ -245,47 +630,45 @@ async def analyze_audio(request: AnalyzeAudioRequest, background_tasks: Backgrou
     """
     try:
         file_contents = []
+        fetch_sem = asyncio.Semaphore(R2_FETCH_CONCURRENCY)
+
+        async def _fetch(key: str, default_mime: str):
+            """R2から取得し、MIMEタイプを拡張子（なければ先頭バイト）から推測（失敗時はNone）"""
+            try:
+                async with fetch_sem:
+                    data = await storage_service.get_file_async(key)
+                return (data, resolve_mime(None, key, data, default_mime))
+            except Exception as e:
+                logger.error("Error fetching file %s: %s", key, e)
+                return None
 
-        # 1. file_keys (複数) があれば優先
+        # 1. file_keys (複数) があれば優先（R2から並列取得）
         if request.file_keys:
-            print(f"DEBUG: Processing {len(request.file_keys)} files from R2", flush=True)
-            for key in request.file_keys:
-                try:
-                    data = storage_service.get_file(key)
-                    # 仮のMIMEタイプ (拡張子から推測)
-                    ext = key.split(".")[-1].lower() if "." in key else "bin"
-                    mime = "application/octet-stream"
-                    if ext in ["mp3", "m4a", "wav"]: mime = f"audio/{ext}"
-                    elif ext == "pdf": mime = "application/pdf"
-                    elif ext in ["jpg", "jpeg", "png"]: mime = f"image/{ext}"
-                    
-                    file_contents.append((data, mime))
-                except Exception as e:
-                    print(f"Error fetching file {key}: {e}", flush=True)
+            logger.debug("Processing %d files from R2", len(request.file_keys))
+            fetched = await asyncio.gather(*[_fetch(key, "application/octet-stream") for key in request.file_keys])
+            file_contents = [item for item in fetched if item is not None]
         
         # 2. file_key (単体) の場合 (後方互換)
         elif request.file_key:
-            print(f"DEBUG: Processing single file from R2: {request.file_key}", flush=True)
-            try:
-                data = storage_service.get_file(request.file_key)
-                mime = "audio/mp4"
-                if request.file_key.lower().endswith(".pdf"): mime = "application/pdf"
-                file_contents.append((data, mime))
-            except Exception as e:
-                print(f"Error fetching file {request.file_key}: {e}", flush=True)
+            logger.debug("Processing single file from R2: %s", request.file_key)
+            item = await _fetch(request.file_key, "audio/mp4")
+            if item is not None:
+                file_contents.append(item)
         
         else:
             raise HTTPException(status_code=400, detail="No file_key or file_keys provided")
 
         if not file_contents:
-             return AnalyzeResponse(success=False, error="No accessible files found")
+             return _analyze_json(success=False, error="No accessible files found")
 
         # 1.5 Google Driveへの自動保存 (会議系のみ・R2経由分)
+        # 分析とは独立しているため待たずにバックグラウンドで実行（Gemini分析と並行）
         if request.analysis_type in ["management_meeting", "service_meeting"]:
             try:
                 folder_id = drive_service.get_folder_id_by_type(request.analysis_type)
                 if folder_id:
-                    print(f"DEBUG: Uploading {len(file_contents)} files from R2 to Drive Folder: {folder_id}", flush=True)
+                    logger.debug("Uploading %d files from R2 to Drive Folder: %s", len(file_contents), folder_id)
+                    uploads = []
                     for i, (data, mime) in enumerate(file_contents):
                         # ファイル名決定 (優先度: filenames > file_keys > file_key > default)
                         fname = f"audio_{i}"
@@ -297,55 +680,50 @@ async def analyze_audio(request: AnalyzeAudioRequest, background_tasks: Backgrou
                         elif request.file_key:
                             fname = request.file_key
                         
-                        drive_service.upload_file(data, fname, mime, folder_id)
+                        uploads.append((data, fname, mime))
+
+                    _spawn_detached(
+                        drive_service.upload_files, uploads, folder_id,
+                        name=f"drive-upload:{request.analysis_type}"
+                    )
                 else:
-                    print(f"DEBUG: No folder ID configured for {request.analysis_type}, skipping upload", flush=True)
+                    logger.debug("No folder ID configured for %s, skipping upload", request.analysis_type)
             except Exception as e:
-                 print(f"Drive Upload Error: {e}", flush=True)
+                 logger.error("Drive Upload Error: %s", e)
+
+        # 分析タイプに応じて処理（同一入力はキャッシュから返す）
+        if request.analysis_type not in ANALYSIS_METHODS:
+            raise ValueError(f"Unknown analysis type: {request.analysis_type}")
+        logger.debug("Starting %s analysis for %d files", request.analysis_type, len(file_contents))
+        result, cache_status = await _run_cached_analysis(request.analysis_type, file_contents)
 
-        # 分析タイプに応じて処理
-        result = {}
         if request.analysis_type == "assessment":
-            print(f"Starting Assessment Analysis for {len(file_contents)} files...", flush=True)
-            result = await ai_service.extract_assessment_info(file_contents)
-            
             # --- Auto-Generation Trigger (Background) ---
             gen_id = str(uuid.uuid4())
             body_id = str(uuid.uuid4())
-            result_text = json.dumps(result, ensure_ascii=False)
-            
-            background_tasks.add_task(run_background_generation, result_text, gen_id, body_id)
+            background_tasks.add_task(run_background_generation, result, gen_id, body_id)
             
-            return AnalyzeResponse(
+            return _analyze_json(
                 success=True, 
                 data=result,
                 genogram_draft_id=gen_id,
-                bodymap_draft_id=body_id
+                bodymap_draft_id=body_id,
+                cache_status=cache_status
             )
 
-        elif request.analysis_type == "management_meeting":
-            result = ai_service.generate_management_meeting_summary(file_contents)
-        elif request.analysis_type == "service_meeting":
-            result = ai_service.generate_service_meeting_summary(file_contents)
-        elif request.analysis_type == "meeting":
-            result = ai_service.generate_meeting_summary(file_contents)
-        elif request.analysis_type == "qa":
-            result = ai_service.extract_qa_from_audio(file_contents)
-        else:
-            raise ValueError(f"Unknown analysis type: {request.analysis_type}")
-        
-        return AnalyzeResponse(success=True, data=result)
+        return _analyze_json(success=True, data=result, cache_status=cache_status)
+    except HTTPException as e:
+        # 503（同時実行上限）などはステータスコードのまま返し、クライアントが再試行できるようにする
+        return _analyze_http_error(e)
     except Exception as e:
-        print(f"ERROR: analyze_audio failed: {e}", flush=True)
-        import traceback
-        traceback.print_exc()
-        return AnalyzeResponse(success=False, error=str(e))
+        logger.exception("analyze_audio failed: %s", e)
+        return _analyze_json(success=False, error=str(e))
 
 
 # ユニバーサル分析エンドポイント（名前は互換性のために analyze/audio/direct も残すか、Frontendを変える）
 # Frontendを /api/analyze/direct に変更する方針で実装
-@app.post("/api/analyze/direct", response_model=AnalyzeResponse)
-@app.post("/api/analyze/audio/direct", response_model=AnalyzeResponse) # 互換性エイリアス
+@app.post("/api/analyze/direct", responses=ANALYZE_RESPONSES)
+@app.post("/api/analyze/audio/direct", responses=ANALYZE_RESPONSES) # 互換性エイリアス
 async def analyze_file_direct(
     background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
@@ -354,84 +732,139 @@ async def analyze_file_direct(
     """
     ファイル直接分析（Universal Input、複数ファイル対応）
     - 音声、PDF、画像を受け入れ（複数可）
-    - 運営会議/サービス会議ならDriveへ保存（全ファイル）
+    - 運営会議/サービス会議ならDriveへ保存（全ファイル、分析と並行してバックグラウンド実行）
     - 全ファイルを統合して分析実行
     - AssessmentならバックグラウンドでGenogram/BodyMap生成
     """
     try:
-        print(f"DEBUG: analyze_file_direct called with {len(files)} files, type={analysis_type}", flush=True)
+        logger.debug("analyze_file_direct called with %d files, type=%s", len(files), analysis_type)
         
-        file_contents = [] # [(content, mime_type), ...]
+        # 全ファイル合計で上限を超えたら読み込みを打ち切る（Content-Lengthなしの送信対策）
+        total_read = 0
+
+        async def _read_capped(file: UploadFile) -> bytes:
+            nonlocal total_read
+            # multipart解析の時点でUploadFileは一時ファイルにスプール済みでサイズも確定している
+            # 上限内なら一括で読み、チャンクのリスト＋joinによる二重のメモリ確保を避ける
+            if file.size is not None:
+                total_read += file.size
+                if total_read > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail=f"Upload too large (max {MAX_UPLOAD_BYTES} bytes)")
+                return await file.read()
+
+            chunks = []
+            while chunk := await file.read(UPLOAD_READ_CHUNK):
+                total_read += len(chunk)
+                if total_read > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail=f"Upload too large (max {MAX_UPLOAD_BYTES} bytes)")
+                chunks.append(chunk)
+            return b"".join(chunks)
+
+        async def _prepare(file: UploadFile):
+            content = await _read_capped(file)
+            # 以降は読み込んだbytesのみを共有して使う（Drive保存・Gemini・キャッシュキー）
+            # スプール用一時ファイルは長い分析の間保持せず、ここで解放する
+            await file.close()
+            # MIMEタイプ補正（拡張子・ファイル先頭バイト）
+            mime_type = resolve_mime(file.content_type, file.filename, content)
+            return (content, mime_type)
+
+        # 全ファイルの読み込みを並列実行
+        file_contents = list(await asyncio.gather(*[_prepare(f) for f in files])) # [(content, mime_type), ...]
+
+        # 1. Google Driveへの自動保存 (会議系のみ)
+        # 分析とは独立しているため待たずにバックグラウンドで実行
+        # （UploadFileはレスポンス後に閉じられるので、読み込み済みのbytesを渡す）
+        if analysis_type in ["management_meeting", "service_meeting"]:
+            folder_id = drive_service.get_folder_id_by_type(analysis_type)
+            if folder_id:
+                logger.debug("Uploading %d files to Drive Folder: %s", len(files), folder_id)
+                uploads = [
+                    (content, file.filename, mime_type)
+                    for file, (content, mime_type) in zip(files, file_contents)
+                ]
+                _spawn_detached(
+                    drive_service.upload_files, uploads, folder_id,
+                    name=f"drive-upload:{analysis_type}"
+                )
+            else:
+                logger.debug("No folder ID for %s", analysis_type)
+
+        # 2. 分析実行（統合分析、同一入力はキャッシュから返す）
+        result, cache_status = await _run_cached_analysis(analysis_type, file_contents)
 
-        for file in files:
-            content = await file.read()
-            mime_type = file.content_type or "application/octet-stream"
-            
-            # 簡易的なMIMEタイプ補正
-            if mime_type == "application/octet-stream":
-                fname = file.filename.lower()
-                if fname.endswith(".pdf"): mime_type = "application/pdf"
-                elif fname.endswith(".jpg") or fname.endswith(".jpeg"): mime_type = "image/jpeg"
-                elif fname.endswith(".png"): mime_type = "image/png"
-                elif fname.endswith(".m4a") or fname.endswith(".mp4"): mime_type = "audio/mp4"
-                elif fname.endswith(".mp3"): mime_type = "audio/mpeg"
-
-            file_contents.append((content, mime_type))
-
-            # 1. Google Driveへの自動保存 (会議系のみ)
-            if analysis_type in ["management_meeting", "service_meeting"]:
-                try:
-                    folder_id = drive_service.get_folder_id_by_type(analysis_type)
-                    if folder_id:
-                        print(f"DEBUG: Uploading to Drive Folder: {folder_id}", flush=True)
-                        drive_service.upload_file(io.BytesIO(content), file.filename, mime_type, folder_id)
-                    else:
-                        print(f"DEBUG: No folder ID for {analysis_type}", flush=True)
-                except Exception as e:
-                     print(f"Drive Upload Error (Direct): {e}", flush=True)
-
-        # 2. 分析実行（統合分析）
-        result = {}
         if analysis_type == "assessment":
-            result = await ai_service.extract_assessment_info(file_contents)
-            
             # --- Auto-Generation Trigger (Background) ---
             gen_id = str(uuid.uuid4())
             body_id = str(uuid.uuid4())
-            result_text = json.dumps(result, ensure_ascii=False)
+            background_tasks.add_task(run_background_generation, result, gen_id, body_id)
             
-            background_tasks.add_task(run_background_generation, result_text, gen_id, body_id)
-            
-            print(f"DEBUG: Analysis complete, Background tasks started. GenID={gen_id}", flush=True)
-            return AnalyzeResponse(
+            logger.debug("Analysis complete, Background tasks started. GenID=%s", gen_id)
+            return _analyze_json(
                 success=True, 
                 data=result, 
                 genogram_draft_id=gen_id, 
-                bodymap_draft_id=body_id
+                bodymap_draft_id=body_id,
+                cache_status=cache_status
             )
 
-        elif analysis_type == "management_meeting":
-            result = ai_service.generate_management_meeting_summary(file_contents)
-        elif analysis_type == "service_meeting":
-            result = ai_service.generate_service_meeting_summary(file_contents)
-        elif analysis_type == "meeting":
-            result = ai_service.generate_meeting_summary(file_contents)
-        elif analysis_type == "qa":
-            result = ai_service.extract_qa_from_audio(file_contents)
-        else:
-            # デフォルトでアセスメント扱い
-            result = ai_service.extract_assessment_info(file_contents)
-        
-        print(f"DEBUG: Analysis complete for type={analysis_type}", flush=True)
-        return AnalyzeResponse(success=True, data=result)
+        logger.debug("Analysis complete for type=%s", analysis_type)
+        return _analyze_json(success=True, data=result, cache_status=cache_status)
+    except HTTPException as e:
+        return _analyze_http_error(e)
     except Exception as e:
-        print(f"ERROR: analyze_file_direct failed: {e}", flush=True)
-        import traceback
-        traceback.print_exc()
-        return AnalyzeResponse(success=False, error=str(e))
+        logger.exception("analyze_file_direct failed: %s", e)
+        return _analyze_json(success=False, error=str(e))
 
 
-@app.post("/api/analyze/pdf", response_model=AnalyzeResponse)
+@app.post("/api/analyze/direct/stream")
+async def analyze_file_direct_stream(
+    files: List[UploadFile] = File(...),
+    analysis_type: str = Form("assessment")
+):
+    """
+    ファイルごとの個別分析（NDJSONストリーム）
+    - 統合分析ではなく1ファイルずつ分析し、終わった順に1行ずつ返す
+      （長い音声が1件あっても、短いファイルの結果を先に表示できる）
+    - 各行: {"index", "filename", "success", "data", "error", "cache"}
+    - Drive保存・Genogram/BodyMapの自動生成は行わない（/api/analyze/direct を使用）
+    """
+    total_read = 0
+    file_contents = []
+    for file in files:
+        content = await file.read()
+        await file.close()
+        total_read += len(content)
+        if total_read > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=f"Upload too large (max {MAX_UPLOAD_BYTES} bytes)")
+        file_contents.append((content, resolve_mime(file.content_type, file.filename, content)))
+
+    async def _analyze_one(index: int, filename: str, item: tuple) -> Dict[str, Any]:
+        try:
+            result, cache_status = await _run_cached_analysis(analysis_type, [item])
+            return {"index": index, "filename": filename, "success": True, "data": result, "error": None, "cache": cache_status}
+        except Exception as e:
+            logger.exception("Stream analysis failed for %s: %s", filename, e)
+            return {"index": index, "filename": filename, "success": False, "data": None, "error": str(e), "cache": None}
+
+    async def _ndjson():
+        tasks = [
+            asyncio.create_task(_analyze_one(i, f.filename, item))
+            for i, (f, item) in enumerate(zip(files, file_contents))
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield orjson.dumps(await next_done) + b"\n"
+        finally:
+            # クライアント切断時は残りの分析を止める
+            # （スレッドで実行中の同期分析は中断できないため、run_in_gemini_slot が終了まで枠を保持する）
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(_ndjson(), media_type="application/x-ndjson")
+
+
+@app.post("/api/analyze/pdf", responses=ANALYZE_RESPONSES)
 async def analyze_pdf(file: UploadFile = File(...)):
     """PDFファイル分析（互換性用: アセスメントとして処理）"""
     # 単一ファイルをリストにラップして呼び出す必要があるが実体がないため
@@ -443,201 +876,242 @@ async def analyze_pdf(file: UploadFile = File(...)):
     
     content = await file.read()
     mime_type = "application/pdf"
-    result = ai_service.extract_assessment_info([(content, mime_type)])
-    return AnalyzeResponse(success=True, data=result)
+    result, cache_status = await _run_cached_analysis("assessment", [(content, mime_type)])
+    return _analyze_json(success=True, data=result, cache_status=cache_status)
 
 
-@app.post("/api/analyze/image", response_model=AnalyzeResponse)
+@app.post("/api/analyze/image", responses=ANALYZE_RESPONSES)
 async def analyze_image(file: UploadFile = File(...)):
     """画像ファイル分析（互換性用: アセスメントとして処理）"""
     content = await file.read()
-    mime_type = file.content_type or "image/jpeg"
-    result = ai_service.extract_assessment_info([(content, mime_type)])
-    return AnalyzeResponse(success=True, data=result)
+    mime_type = resolve_mime(file.content_type, file.filename, content, default="image/jpeg")
+    result, cache_status = await _run_cached_analysis("assessment", [(content, mime_type)])
+    return _analyze_json(success=True, data=result, cache_status=cache_status)
+
+
+# 手入力フィールド（リクエスト属性, 書き込み先キー）: 値があればAI分析結果より優先
+_ASSESSMENT_MANUAL_FIELDS = (
+    ("consultant_name", "相談者氏名"),
+    ("assessment_reason", "アセスメント理由"),
+    ("relationship", "続柄"),
+    ("assessment_place", "実施場所"),
+    ("reception_method", "受付方法"),
+    ("user_name", "利用者情報_氏名_漢字"),
+)
+_SERVICE_MEETING_MANUAL_FIELDS = (
+    ("date_str", "開催日"),
+    ("time_str", "開催時間"),
+    ("place", "開催場所"),
+    ("user_name", "利用者名"),
+    ("staff_name", "担当者名"),
+)
+# 開催回数から「第」「回」を除去する変換表
+_MEETING_COUNT_STRIP = str.maketrans("", "", "第回")
+
+
+def _apply_manual_fields(request: SheetsWriteRequest, fields: tuple) -> Dict[str, Any]:
+    """手入力された値を request.data に上書きして返す"""
+    data = request.data or {}
+    for attr, key in fields:
+        value = getattr(request, attr)
+        if value:
+            data[key] = value
+    return data
 
 
-@app.post("/api/sheets/write", response_model=AnalyzeResponse)
+async def _write_create_assessment(request: SheetsWriteRequest) -> KakanaiJSONResponse:
+    """新規作成モード（アセスメントシート用）"""
+    template_id = drive_service.get_template_id_by_type("assessment")
+    folder_id = drive_service.get_folder_id_by_type("assessment")
+
+    if not template_id or not folder_id:
+        return _analyze_json(
+            success=False, 
+            error="Assessment Template ID or Folder ID not configured in backend variables."
+        )
+
+    # --- 手入力データの優先適用 (アセスメントシート) ---
+    # 利用者名は create_and_write_assessment が参照する「利用者情報_氏名_漢字」に入れる
+    request.data = _apply_manual_fields(request, _ASSESSMENT_MANUAL_FIELDS)
+
+    result = await asyncio.to_thread(
+        sheets_service.create_and_write_assessment,
+        template_id=template_id,
+        folder_id=folder_id,
+        data_dict=request.data,
+        sheet_name=request.sheet_name
+    )
+    return _analyze_json(
+        success=result.get("success", False),
+        data=result,
+        error=result.get("error")
+    )
+
+
+async def _write_append_service_meeting(request: SheetsWriteRequest) -> KakanaiJSONResponse:
+    """行追加モード（サービス担当者会議）"""
+    # --- 手入力データの優先適用 ---
+    # アプリから別途送られてくる「日時」「場所」「氏名」「回数」を
+    # AIの分析結果(request.data)に強制上書きする。
+    request.data = _apply_manual_fields(request, _SERVICE_MEETING_MANUAL_FIELDS)
+    if request.meeting_count:
+        # 数値のみ抽出（「第6回」→「6」）
+        request.data["開催回数"] = request.meeting_count.translate(_MEETING_COUNT_STRIP)
+
+    # 1. 既存のマスタシートへ行追加
+    append_result = await asyncio.to_thread(
+        sheets_service.write_service_meeting_to_row,
+        spreadsheet_id=request.spreadsheet_id,
+        data_dict=request.data,
+        sheet_name=request.sheet_name or "貼り付け用"
+    )
+
+    # 2. 個別ファイルの新規作成 (New Feature)
+    # request.spreadsheet_id passed as the template ID (base spreadsheet)
+    create_result = {}
+    try:
+        create_result = await asyncio.to_thread(
+            sheets_service.create_and_write_service_meeting,
+            template_id=request.spreadsheet_id,
+            data=request.data
+        )
+    except Exception as e:
+        logger.exception("Failed to create individual service meeting file: %s", e)
+
+    # 結果の統合
+    result = append_result
+    if create_result.get("success"):
+        # 個別ファイルが作成できた場合は、そのURLを優先して返す (ユーザーがすぐ開けるように)
+        result["sheet_url"] = create_result.get("sheet_url")
+    return _analyze_json(
+        success=result.get("success", False),
+        data=result,
+        error=result.get("error")
+    )
+
+
+async def _write_append_management_meeting(request: SheetsWriteRequest) -> KakanaiJSONResponse:
+    """行追加モード（運営会議）"""
+    # 1. 既存のマスタシートへ行追加
+    append_result = await asyncio.to_thread(
+        sheets_service.write_management_meeting_to_row,
+        spreadsheet_id=request.spreadsheet_id,
+        data=request.data,
+        date_str=request.date_str,
+        time_str=request.time_str,
+        place=request.place,
+        participants=request.participants,
+        sheet_name=request.sheet_name or "貼り付け用"
+    )
+
+    # 2. 個別ファイルの新規作成（アセスメントシート方式）
+    folder_id = drive_service.get_folder_id_by_type("management_meeting")
+    create_result = {}
+
+    if folder_id:
+        logger.debug("Creating separate management meeting file in folder %s", folder_id)
+        create_result = await asyncio.to_thread(
+            sheets_service.create_and_write_management_meeting,
+            template_id=request.spreadsheet_id, # マスタシートをテンプレートとして使用
+            folder_id=folder_id,
+            data=request.data,
+            date_str=request.date_str,
+            time_str=request.time_str,
+            place=request.place,
+            participants=request.participants
+        )
+    else:
+        logger.debug("No management meeting folder ID configured, skipping individual file creation")
+
+    # 結果の統合（個別ファイル作成が成功していれば、そのURLを優先して返す）
+    result = append_result
+    if create_result.get("success"):
+        result["sheet_url"] = create_result.get("sheet_url")
+        result["individual_file_created"] = True
+        result["individual_file_id"] = create_result.get("spreadsheet_id")
+        logger.debug("Returned URL updated to new file: %s", result["sheet_url"])
+    return _analyze_json(
+        success=result.get("success", False),
+        data=result,
+        error=result.get("error")
+    )
+
+
+async def _write_append_row(request: SheetsWriteRequest) -> KakanaiJSONResponse:
+    """行追加モード（その他の会議タイプ: マスタシートへの行追加のみ）"""
+    result = await asyncio.to_thread(
+        sheets_service.write_service_meeting_to_row,
+        spreadsheet_id=request.spreadsheet_id,
+        data_dict=request.data,
+        sheet_name=request.sheet_name or "貼り付け用"
+    )
+    return _analyze_json(
+        success=result.get("success", False),
+        data=result,
+        error=result.get("error")
+    )
+
+
+async def _write_mapping(request: SheetsWriteRequest) -> KakanaiJSONResponse:
+    """マッピングモード（旧互換、明示的にID指定されたアセスメントなど）"""
+    if not request.spreadsheet_id:
+         return _analyze_json(success=False, error="Spreadsheet ID required for mapping mode")
+
+    written_count = await asyncio.to_thread(
+        sheets_service.write_data,
+        spreadsheet_id=request.spreadsheet_id,
+        sheet_name=request.sheet_name,
+        data=request.data,
+        mapping_type=request.mapping_type
+    )
+    return _analyze_json(success=True, data={"written_cells": written_count})
+
+
+# (write_mode, meeting_type) → 書き込み処理
+# meeting_type が None のキーはそのモードの既定処理。どれにも該当しなければマッピングモード
+SHEETS_WRITE_HANDLERS = {
+    ("create", None): _write_create_assessment,
+    ("append", "service_meeting"): _write_append_service_meeting,
+    ("append", "management_meeting"): _write_append_management_meeting,
+    ("append", None): _write_append_row,
+}
+
+
+@app.post("/api/sheets/write", responses=ANALYZE_RESPONSES)
 async def write_to_sheets(request: SheetsWriteRequest):
     """
     Googleスプレッドシートへの書き込み
     """
     try:
-        print(f"DEBUG: write_to_sheets called. Mode={request.write_mode}, Type={request.meeting_type}", flush=True)
+        logger.debug("write_to_sheets called. Mode=%s, Type=%s", request.write_mode, request.meeting_type)
 
-        if request.write_mode == "create":
-            # 新規作成モード（アセスメントシート用）
-            template_id = drive_service.get_template_id_by_type("assessment")
-            folder_id = drive_service.get_folder_id_by_type("assessment")
-            
-            if not template_id or not folder_id:
-                return AnalyzeResponse(
-                    success=False, 
-                    error="Assessment Template ID or Folder ID not configured in backend variables."
-                )
-
-            # --- 手入力データの優先適用 (アセスメントシート) ---
-            if not request.data:
-                request.data = {}
-            
-            if request.consultant_name:
-                request.data["相談者氏名"] = request.consultant_name
-            if request.assessment_reason:
-                request.data["アセスメント理由"] = request.assessment_reason
-            if request.relationship:
-                request.data["続柄"] = request.relationship
-            if request.assessment_place:
-                request.data["実施場所"] = request.assessment_place
-            if request.reception_method:
-                request.data["受付方法"] = request.reception_method
-            
-            # 注: アプリフォームから「利用者名(相談対象者)」が送られてくるフィールドがあるか確認が必要
-            # もし request.user_name がアセスメントでも使われるならここでマッピングする
-            if request.user_name:
-                 # マッピング定義に従い「利用者情報_氏名_漢字」や「基本情報.氏名」に入れるべきだが
-                 # create_and_write_assessment は data_dict["利用者情報_氏名_漢字"] や data_dict["氏名"] を見る
-                 request.data["利用者情報_氏名_漢字"] = request.user_name
-
-            result = sheets_service.create_and_write_assessment(
-                template_id=template_id,
-                folder_id=folder_id,
-                data_dict=request.data,
-                sheet_name=request.sheet_name
-            )
-            return AnalyzeResponse(
-                success=result.get("success", False),
-                data=result,
-                error=result.get("error")
-            )
-
-        elif request.write_mode == "append":
-            # 行追加モード（会議用）
-            if request.meeting_type == "service_meeting":
-                # --- 手入力データの優先適用 ---
-                # アプリから別途送られてくる「日時」「場所」「氏名」「回数」を
-                # AIの分析結果(request.data)に強制上書きする。
-                if not request.data:
-                    request.data = {}
-                
-                # 日時: date_str + time_str
-                if request.date_str:
-                    request.data["開催日"] = request.date_str
-                if request.time_str:
-                     request.data["開催時間"] = request.time_str
-                if request.place:
-                    request.data["開催場所"] = request.place
-                
-                # 新規追加: user_name, staff_name, meeting_count
-                if request.user_name:
-                    request.data["利用者名"] = request.user_name
-                if request.staff_name:
-                    request.data["担当者名"] = request.staff_name
-                if request.meeting_count:
-                    # 数値のみ抽出（「第6回」→「6」）
-                    # "第"と"回"を除去するシンプルな実装
-                    clean_count = request.meeting_count.replace("第", "").replace("回", "")
-                    request.data["開催回数"] = clean_count
-                
-                # 1. 既存のマスタシートへ行追加
-                append_result = sheets_service.write_service_meeting_to_row(
-                    spreadsheet_id=request.spreadsheet_id,
-                    data_dict=request.data,
-                    sheet_name=request.sheet_name or "貼り付け用"
-                )
-                
-                # 2. 個別ファイルの新規作成 (New Feature)
-                # request.spreadsheet_id passed as the template ID (base spreadsheet)
-                create_result = {}
-                try:
-                    create_result = sheets_service.create_and_write_service_meeting(
-                        template_id=request.spreadsheet_id,
-                        data=request.data
-                    )
-                except Exception as e:
-                    print(f"ERROR: Failed to create individual service meeting file: {e}")
-                    import traceback
-                    traceback.print_exc()
-
-                # 結果の統合
-                result = append_result
-                if create_result.get("success"):
-                    # 個別ファイルが作成できた場合は、そのURLを優先して返す (ユーザーがすぐ開けるように)
-                    result["sheet_url"] = create_result.get("sheet_url")
-            elif request.meeting_type == "management_meeting":
-                # 1. 既存のマスタシートへ行追加
-                append_result = sheets_service.write_management_meeting_to_row(
-                    spreadsheet_id=request.spreadsheet_id,
-                    data=request.data,
-                    date_str=request.date_str,
-                    time_str=request.time_str,
-                    place=request.place,
-                    participants=request.participants,
-                    sheet_name=request.sheet_name or "貼り付け用"
-                )
-                
-                # 2. 個別ファイルの新規作成（アセスメントシート方式）
-                folder_id = drive_service.get_folder_id_by_type("management_meeting")
-                create_result = {}
-                
-                if folder_id:
-                    print(f"DEBUG: Creating separate management meeting file in folder {folder_id}", flush=True)
-                    create_result = sheets_service.create_and_write_management_meeting(
-                        template_id=request.spreadsheet_id, # マスタシートをテンプレートとして使用
-                        folder_id=folder_id,
-                        data=request.data,
-                        date_str=request.date_str,
-                        time_str=request.time_str,
-                        place=request.place,
-                        participants=request.participants
-                    )
-                else:
-                    print("DEBUG: No management meeting folder ID configured, skipping individual file creation", flush=True)
-
-                # 結果の統合（個別ファイル作成が成功していれば、そのURLを優先して返す）
-                result = append_result
-                if create_result.get("success"):
-                    result["sheet_url"] = create_result.get("sheet_url")
-                    result["individual_file_created"] = True
-                    result["individual_file_id"] = create_result.get("spreadsheet_id")
-                    print(f"DEBUG: Returned URL updated to new file: {result['sheet_url']}", flush=True)
-            else:
-                result = sheets_service.write_service_meeting_to_row(
-                    spreadsheet_id=request.spreadsheet_id,
-                    data_dict=request.data,
-                    sheet_name=request.sheet_name or "貼り付け用"
-                )
-            return AnalyzeResponse(
-                success=result.get("success", False),
-                data=result,
-                error=result.get("error")
-            )
-        else:
-            # マッピングモード（旧互換、明示的にID指定されたアセスメントなど）
-            if not request.spreadsheet_id:
-                 return AnalyzeResponse(success=False, error="Spreadsheet ID required for mapping mode")
-
-            written_count = sheets_service.write_data(
-                spreadsheet_id=request.spreadsheet_id,
-                sheet_name=request.sheet_name,
-                data=request.data,
-                mapping_type=request.mapping_type
-            )
-            return AnalyzeResponse(success=True, data={"written_cells": written_count})
+        handler = (
+            SHEETS_WRITE_HANDLERS.get((request.write_mode, request.meeting_type))
+            or SHEETS_WRITE_HANDLERS.get((request.write_mode, None))
+            or _write_mapping
+        )
+        return await handler(request)
 
     except Exception as e:
-        print(f"ERROR: write_to_sheets failed: {e}", flush=True)
-        import traceback
-        traceback.print_exc()
-        return AnalyzeResponse(success=False, error=str(e))
+        logger.exception("write_to_sheets failed: %s", e)
+        return _analyze_json(success=False, error=str(e))
 
 
-@app.post("/api/genogram/generate", response_model=AnalyzeResponse)
+@app.post("/api/genogram/generate", responses=ANALYZE_RESPONSES)
 async def generate_genogram(request: GenogramRequest):
     """ジェノグラムデータ生成"""
     try:
-        result = ai_service.generate_genogram_data(request.text)
-        return AnalyzeResponse(success=True, data=result)
+        cache_key = make_cache_key(ai_service.model_name, PROMPT_VERSION, "genogram", request.text)
+        result = await llm_cache.get(cache_key)
+        cache_status = "HIT" if result is not None else "MISS"
+        if result is None:
+            result = await run_in_gemini_slot(ai_service.generate_genogram_data, request.text)
+            await llm_cache.set(cache_key, result)
+        return _analyze_json(success=True, data=result, cache_status=cache_status)
+    except HTTPException as e:
+        return _analyze_http_error(e)
     except Exception as e:
-        return AnalyzeResponse(success=False, error=str(e))
+        return _analyze_json(success=False, error=str(e))
 
 
 @app.post("/api/csv/convert")
@@ -646,17 +1120,16 @@ async def convert_csv(file: UploadFile = File(...)):
     try:
         content = await file.read()
         
-        # サービスの呼び出し
+        # サービスの呼び出し（pandas/openpyxlの変換はCPU処理のためスレッドで実行）
         # 戻り値は (excel_binary, output_filename)
-        excel_data, filename = csv_service.convert_csv_to_excel(content, file.filename)
+        excel_data, filename = await asyncio.to_thread(csv_service.convert_csv_to_excel, content, file.filename)
         
         # 日本語ファイル名対応 (URLエンコード)
-        from urllib.parse import quote
         encoded_filename = quote(filename)
         
-        # StreamingResponseで返す
-        return StreamingResponse(
-            io.BytesIO(excel_data),
+        # 生成済みのbytesをそのまま返す（BytesIO経由のストリーミングによる再コピーを避ける）
+        return Response(
+            content=excel_data,
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={
                 "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"
@@ -664,21 +1137,39 @@ async def convert_csv(file: UploadFile = File(...)):
         )
 
     except Exception as e:
-        print(f"ERROR: CSV convert failed: {e}", flush=True)
-        # traceback.print_exc()
+        logger.exception("CSV convert failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/bodymap/generate", response_model=AnalyzeResponse)
+@app.post("/api/bodymap/generate", responses=ANALYZE_RESPONSES)
 async def generate_bodymap(request: BodyMapRequest):
     """身体図データ生成"""
     try:
-        result = ai_service.generate_bodymap_data(request.text)
-        return AnalyzeResponse(success=True, data=result)
+        cache_key = make_cache_key(ai_service.model_name, PROMPT_VERSION, "bodymap", request.text)
+        result = await llm_cache.get(cache_key)
+        cache_status = "HIT" if result is not None else "MISS"
+        if result is None:
+            result = await run_in_gemini_slot(ai_service.generate_bodymap_data, request.text)
+            await llm_cache.set(cache_key, result)
+        return _analyze_json(success=True, data=result, cache_status=cache_status)
+    except HTTPException as e:
+        return _analyze_http_error(e)
     except Exception as e:
-        return AnalyzeResponse(success=False, error=str(e))
+        return _analyze_json(success=False, error=str(e))
 
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop（イベントループ）と httptools（HTTPパーサ）を明示的に使用（uvloopはWindows非対応）
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8000")),
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        log_level=os.getenv("LOG_LEVEL", "INFO").lower(),
+        # リクエストごとのアクセスログ出力を省く（必要な場合のみ ACCESS_LOG=true）
+        access_log=os.getenv("ACCESS_LOG", "false").lower() in ("1", "true", "yes")
+    )
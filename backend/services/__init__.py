@@ -1,6 +1,18 @@
 # Services module
-from .ai_service import AIService
-from .storage_service import StorageService
-from .sheets_service import SheetsService
+# 各サービスは初回アクセス時に読み込む（例: services.llm_cache だけを使う場合に
+# google-generativeai や gspread の読み込みを待たない）
+import importlib
 
-__all__ = ["AIService", "StorageService", "SheetsService"]
+_EXPORTS = {
+    "AIService": ".ai_service",
+    "StorageService": ".storage_service",
+    "SheetsService": ".sheets_service",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,30 +2,436 @@
 AI Service - Google Gemini統合
 """
 import google.generativeai as genai
-import json
+from google.api_core import exceptions as google_exceptions
+from google.generativeai.client import get_default_file_client
+from googleapiclient.http import MediaIoBaseUpload
+import httplib2
+import orjson
 import os
-import io
+import logging
 import time
+import random
 import re
+import inspect
+import io
 import tempfile
+import threading
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
 from pathlib import Path
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, Union
 try:
     from utils.mapping_parser import MappingParser
 except ImportError:
     # Fallback for different execution contexts
     from ..utils.mapping_parser import MappingParser
 
+logger = logging.getLogger("kakanai")
+
 # マッピングファイルのパス
 CONFIG_DIR = Path(__file__).parent.parent / "config"
 MAPPING_FILE = CONFIG_DIR / "mapping.txt"
 MAPPING2_FILE = CONFIG_DIR / "mapping2.txt"
 
+# ファイル内容（bytes または memoryview。スライス時にコピーを作らずに渡せる）
+FileData = Union[bytes, memoryview]
+
+# Geminiアップロード時の表示名に付ける拡張子（MIMEタイプ / 主タイプ → 拡張子）
+_UPLOAD_SUFFIX = {
+    "application/pdf": ".pdf",
+    "audio": ".m4a",
+    "image": ".jpg",
+}
+
+# アセスメント抽出の各フェーズ名
+# Note: _categorize_fields が返す13グループと順番を合わせること
+ASSESSMENT_PHASE_NAMES = [
+    "基本情報・社会基盤（氏名、住所、認定情報など）",
+    "基本情報・詳細（主訴、家族状況、意向など）",
+    "医療・管理（病名、受診状況、保険情報など）",         # Phase 3a
+    "経歴・生活史（生活リズム、これまでの経緯など）",        # Phase 3b
+    "心身機能（身体状況・麻痺・拘縮・痛み・皮膚・感覚など）", # Phase 4 -> 5
+    "精神・認知機能（認知症、BPSD、精神症状、判断能力など）", # Phase 5 -> 6
+    "身体ADL・主要（移動、食事、排泄）",                   # Phase 6 -> 7
+    "身体ADL・動作（入浴、更衣、移乗、姿勢保持など）",       # Phase 7 -> 8
+    "IADL・認知・伝達（家事、金銭管理、コミュニケーション）", # Phase 8 -> 9
+    "サービスの利用状況・社会資源",                        # Phase 9 -> 10
+    "住環境・設備（家屋構造、住宅改修、福祉用具など）",     # Phase 10a -> 11
+    "社会・介護力（社会参加、役割、家族支援など）",         # Phase 10b -> 12
+    "留意事項・方針・見通し・ICF（環境・個人因子など）"      # Phase 10c -> 13
+]
+
+# アセスメント項目名 → フェーズ（グループ）の分類キーワード
+# G0: Basic (Admin) / G1: Basic (Desc) / G2: Medical (Admin) [Phase 3a] / G3: Medical (History) [Phase 3b]
+# G4: Body / G5: Mental / G6: ADL Major / G7: ADL Action / G8: IADL / G9: Services
+# G10: Housing [Phase 10a] / G11: Social/Care [Phase 10b] / G12: Remarks/ICF [Phase 10c]
+# 判定順（上から順に、最初にキーワードを含んだグループに割り当てる）
+# G12 は汎用的な「社会」等より先に特定の備考系を拾うため G11 より前に判定する
+FIELD_GROUP_RULES = (
+    (9, ("利用している支援", "社会資源", "フォーマル", "インフォーマル")),
+    (10, ("居室", "トイレ", "浴室", "住宅改修", "福祉用具", "エレベーター", "畳", "段差", "手すり", "寝具", "冷暖房", "便器", "浴槽", "シャワー", "所有形態")),
+    (12, ("留意", "環境因子", "個人因子", "見通し", "方針", "虐待", "ターミナル", "医療", "審査会", "特記")),
+    (11, ("社会", "役割", "介護力", "支援", "家族支援", "生活保護", "手帳", "成人後見", "日常生活自立支援")),
+    (8, ("服薬", "調理", "掃除", "洗濯", "買物", "物品", "金銭", "コミュニケーション", "意思", "指示")),
+    (6, ("移動", "食事", "水分", "排泄")),
+    (7, ("入浴", "更衣", "整容", "寝返り", "起き上がり", "立ち上がり", "座位", "立位", "移乗")),
+    (5, ("認知機能", "行動障害", "精神", "阻害要因", "判断能力")),
+    (4, ("視力", "聴力", "口腔", "栄養", "身長", "体重", "血圧", "アレルギー", "麻痺", "拘縮", "痛み", "褥瘡", "体温", "脈拍", "皮膚", "感覚")),
+    (2, ("健康", "病名", "薬", "受診", "主治医", "医療機関", "負担割合")),
+    (3, ("経緯", "搬送", "これまでの生活", "生活リズム", "状況")),
+    (1, ("主訴", "意向", "家族", "世帯", "状況や関わり", "介護者")),
+    (0, ("作成", "受付", "相談者", "利用者", "住居", "設備", "年金", "保険", "認定", "障害高齢者", "認知症高齢者", "被保険者", "氏名", "住所", "連絡先")),
+)
+# どのキーワードにも該当しない項目の割り当て先 (G12: Remarks/ICF)
+FALLBACK_FIELD_GROUP = 12
+# グループごとのキーワードを1つの正規表現（選択）にまとめたもの（部分一致の走査をC実装で1回に）
+_FIELD_GROUP_PATTERNS = tuple(
+    (group_index, re.compile("|".join(map(re.escape, keywords))))
+    for group_index, keywords in FIELD_GROUP_RULES
+)
+
+# --- プロンプト（呼び出しごとに組み立てず、モジュール定数として1回だけ定義） ---
+
+# 会議録（汎用）
+MEETING_SUMMARY_PROMPT = """
+あなたはケアマネジメントの専門家であり、医療・福祉分野のプロの記録担当者です。
+アップロードされたデータ（複数ファイル可）を注意深く分析し、統合して1つの公式な会議録を作成します。
+
+出力形式は以下のJSONです：
+{
+  "開催日": "日付",
+  "開催場所": "場所",
+  "開催時間": "時間",
+  "開催回数": "回数",
+  "担当者名": "名前",
+  "利用者名": "名前",
+  "検討内容": "詳細な会議録テキスト",
+  "検討した項目": "会議の目的、暫定プラン、重要事項",
+  "結論": "決定事項リスト"
+}
+"""
+
+# 運営会議
+MANAGEMENT_MEETING_PROMPT = """
+あなたは、医療・福祉分野のプロの記録担当者です。
+入力されたデータ（会議の音声、または記録書類など複数可）を分析・統合し、以下の情報を抽出・整理して、**JSON形式**で出力してください。
+
+## 出力するJSONのキーと作成ルール
+
+1. "agenda" (議題項目)
+   - 以下の議題リストを確認し、話された内容が含まれていれば行末に「●」を付けてください。
+   - 形式はリスト形式ではなく、改行を含む1つのテキスト文字列としてください。
+   【議題リストテンプレート】
+   ①現に抱える処遇困難ケースについて
+   ②過去に取り扱ったケースについての問題点及びその改善方策
+   ③地域における事業所や活用できる社会資源の状況
+   ④保健医療及び福祉に関する諸制度
+   ⑤ケアマネジメントに関する技術
+   ⑥利用者からの苦情があった場合は、その内容及び改善方針
+   ⑦その他必要な事項
+
+2. "support_24h" (24時間対応)
+3. "sharing_matters" (共有事項)
+   - 形式:
+     ■利用者情報共有
+     　...
+     ■その他共有事項
+     　...
+
+## 出力例 (JSON)
+{
+  "agenda": "①現に抱える処遇困難ケースについて●\\n②過去に取り扱ったケースについての問題点及びその改善方策\\n...",
+  "support_24h": "12/5 18:00 佐藤対応: 〇〇様転倒により救急搬送。入院となる。",
+  "sharing_matters": "■利用者情報共有\\n〇武島（ケアマネ）：宮城様 老健退所後の自宅生活...\\n\\n■その他共有事項\\n〇リハビリ：松浦クリニックでの利用が可能か..."
+}
+"""
+
+# サービス担当者会議
+SERVICE_MEETING_PROMPT = """
+あなたはケアマネジメントの専門家であり、医療・福祉分野のプロの記録担当者です。
+アップロードされたデータ（複数ファイル可）を注意深く分析し、統合して1つの公式な会議録を作成します。
+あなたのタスクは、入力データ全体の内容を完全に理解・把握し、以下の【統合出力フォーマット】に厳密に従って会議録をまとめることです。
+
+# 出力要件
+以下のキーを持つJSONオブジェクトを出力してください。
+値はマークダウンを含まないプレーンテキストにしてください。
+改行は \\n で表現してください。
+
+JSONキー仕様:
+- "検討内容": 【統合出力フォーマット】に従った詳細な会議録テキスト
+- "検討した項目": 会議の目的、暫定プラン、重要事項をまとめたテキスト
+- "結論": 決定事項、今後の方針、モニタリング点などを箇条書き6~8項目程度
+
+# 【統合出力フォーマット】（検討内容の形式）
+①【本人及び家族の意向】...
+②【心身・生活状況】...
+③【会議の結論・ケアプラン詳細】...
+④【各事業所の役割分担と確認事項】...
+⑤【福祉用具・住宅改修等に関する検討事項】...
+
+**必須要件**：結論には必ず「サービス担当へ、個別援助計画書の提出を依頼する」という文言を含めてください。
+"""
+
+# Q&A抽出
+QA_PROMPT = """
+提供されたデータを質問と回答のペアとして抽出してください。
+出力形式：
+{
+  "qa_pairs": [
+    {"question": "質問1", "answer": "回答1"},
+    {"question": "質問2", "answer": "回答2"}
+  ]
+}
+"""
+
+# ジェノグラム（{text} に分析結果を埋め込む）
+GENOGRAM_PROMPT_TEMPLATE = """
+以下のテキストから家族構成と関係性を抽出し、厳密に指定されたJSON形式で出力してください。
+
+テキスト: {text}
+
+## 出力ルール
+1. **JSON形式**で出力し、キー `nodes` と `edges` を含めること。
+2. `nodes`: 各人物のリスト。
+   - `id`: 一意のID文字列 (例: "p1", "p2")
+   - `data`: {{ "label": "氏名または続柄", "gender": "male" または "female", "deceased": true/false }}
+   - `type`: "person" (固定)
+   - `position`: {{ "x": 0, "y": 0 }} (すべて0でよい)
+3. `edges`: 関係性のリスト。
+   - `id`: 一意のID文字列 (例: "e1")
+   - `source`: 関係元の `id`
+   - `target`: 関係先の `id`
+   - `type`: "marriage" (婚姻/事実婚) または "smoothstep" (親子などそれ以外)
+   - `data`: もしあれば関係の詳細 (例: {{ "label": "離婚" }})
+
+## 出力例
+{{
+  "nodes": [
+    {{ "id": "p1", "type": "person", "data": {{ "label": "本人", "gender": "female", "deceased": false }}, "position": {{ "x": 0, "y": 0 }} }},
+    {{ "id": "p2", "type": "person", "data": {{ "label": "長男", "gender": "male", "deceased": false }}, "position": {{ "x": 0, "y": 0 }} }}
+  ],
+  "edges": [
+    {{ "id": "e1", "source": "p1", "target": "p2", "type": "smoothstep" }}
+  ]
+}}
+"""
+
+# 身体図（{text} に分析結果を埋め込む）
+BODYMAP_PROMPT_TEMPLATE = """
+以下のテキストから身体状況（マヒ、欠損、機能低下、痛みなど）を抽出し、指定されたJSON形式で出力してください。
+
+テキスト: {text}
+
+## ルール
+1. `findings` というキーを持つJSONオブジェクトを出力してください。
+2. 各findingには以下の要素を含めてください。
+   - `part`: 部位キー (**必ず以下のリストから選択すること**)
+     - head, face, neck
+     - shoulder (肩全体), right_shoulder, left_shoulder
+     - chest (胸部), stomach (腹部)
+     - back (背部), hip (臀部/腰)
+     - arm (腕全体), hand (手)
+     - leg (足全体), right_leg, left_leg
+   - `condition`: 状態の説明 (日本語可。例: "右片麻痺", "褥瘡")
+   - `note`: 詳細なコメント (日本語可)
+
+## 注意
+- 部位 (`part`) は英語のキーである必要があります。「右腕」なら `arm` ではなく `arm` (位置指定がない場合) または近いものを選んでください。迷ったら `chest` (中心) にし、`note`で補足してください。
+- 複数の症状がある場合は、複数のfindingを作成してください。
+
+## 出力例
+{{
+  "findings": [
+    {{ "part": "right_shoulder", "condition": "拘縮", "note": "可動域制限あり" }},
+    {{ "part": "stomach", "condition": "手術痕", "note": "盲腸の手術痕あり" }}
+  ]
+}}
+"""
+
+# サービス担当者会議の結論に必ず含める文言
+SERVICE_MEETING_MANDATORY_TEXT = "サービス担当へ、個別援助計画書の提出を依頼する"
+
+# 複数ファイルをGeminiへ同時にアップロード・削除する数の上限
+GEMINI_UPLOAD_CONCURRENCY = 4
+# アップロード後のPROCESSING状態のポーリング間隔（秒、初回→上限まで倍々に延ばす）
+PROCESSING_POLL_INITIAL = 0.2
+PROCESSING_POLL_MAX = 2.0
+# Gemini呼び出しのレート制御（プロセス単位）
+# GEMINI_RPM: 1分あたりの平均呼び出し数、GEMINI_BURST: 瞬間的に許す呼び出し数（アセスメント13フェーズ分）
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "60"))
+GEMINI_BURST = int(os.getenv("GEMINI_BURST", "15"))
+# 429時のリトライ待機（サーバーの指定がなければ指数バックオフ + ジッター）
+# 並列フェーズが同時に429を受けても再試行が揃わないよう、待機時間に比例したジッター（最大+50%）を加える
+RETRY_BASE_DELAY = 4.0
+RETRY_MAX_DELAY = 30.0
+RETRY_JITTER = 0.5
+
+# File APIへのアップロード用HTTPのタイムアウト（秒）
+UPLOAD_HTTP_TIMEOUT = 300
+
+# httplib2.Http はスレッドセーフではないため、アップロードはスレッドごとのHttpで送る
+_upload_local = threading.local()
+
+
+class RateLimiter:
+    """
+    Gemini呼び出し用のトークンバケット（スレッド・イベントループ間で共有）
+    429を受けたら補充レートを半減し、成功が続けば少しずつ元に戻す（AIMD）
+    """
+    def __init__(self, rpm: float, burst: int):
+        self.max_rate = rpm / 60.0
+        self.min_rate = self.max_rate / 8
+        self.rate = self.max_rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """トークンを1つ予約し、使えるようになるまでの待ち時間（秒）を返す"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def on_success(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def on_rate_limited(self):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+
+gemini_rate_limiter = RateLimiter(GEMINI_RPM, GEMINI_BURST)
+
+
+# 429エラーメッセージ中のサーバー指定待ち時間（"retry in 12.3s"）
+_RETRY_RE = re.compile(r"retry in (\d+(?:\.\d+)?)s")
+
+# 改行とその前後の空白（空行を含む）
+_NEWLINE_WS_RE = re.compile(r"\s*\n\s*")
+
+# 不正なJSONが返ってきた場合の再プロンプト回数と、その際に付け足す指示
+VALIDATION_RETRIES = 2
+VALID_JSON_REMINDER = "Return only valid JSON."
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    if isinstance(error, google_exceptions.ResourceExhausted):
+        return True
+    error_str = str(error)
+    return "429" in error_str or "quota" in error_str.lower()
+
+
+def _retry_delay(error_str: str, attempt: int) -> float:
+    """429後の待機秒数（サーバーが指定した待ち時間を優先）"""
+    match = _RETRY_RE.search(error_str)
+    if match:
+        return float(match.group(1)) + 1
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt) * (1 + random.random() * RETRY_JITTER)
+
+
+def prompt_definitions() -> list[str]:
+    """
+    生成結果に影響するプロンプト定義の一覧（LLMキャッシュのプロンプトバージョン算出用）
+    プロンプト定数・フェーズ分類と、アセスメントのプロンプトを組み立てる処理のみを対象にし、
+    ログ出力などプロンプト以外の変更ではキャッシュを無効化しない
+    """
+    return [
+        MEETING_SUMMARY_PROMPT,
+        MANAGEMENT_MEETING_PROMPT,
+        SERVICE_MEETING_PROMPT,
+        QA_PROMPT,
+        GENOGRAM_PROMPT_TEMPLATE,
+        BODYMAP_PROMPT_TEMPLATE,
+        SERVICE_MEETING_MANDATORY_TEXT,
+        VALID_JSON_REMINDER,
+        repr(ASSESSMENT_PHASE_NAMES),
+        repr((FIELD_GROUP_RULES, FALLBACK_FIELD_GROUP)),
+        # アセスメントのフェーズ別プロンプトは項目リストから組み立てるため、組み立て処理自体を含める
+        inspect.getsource(AIService._generate_partial_prompt),
+    ]
+
+
+class PartialAssessmentError(Exception):
+    """
+    アセスメントの一部フェーズが失敗した（成功したフェーズの統合結果を保持する）
+    呼び出し側は部分結果を返してよいが、キャッシュには保存しないこと
+    """
+
+    def __init__(self, result: Dict[str, Any], failed_phases: list[int]):
+        super().__init__(f"Assessment phases failed: {failed_phases}")
+        self.result = result
+        self.failed_phases = failed_phases
+
+
+class _BufferReader(io.RawIOBase):
+    """
+    bytes / memoryview を読み取り専用ファイルとして見せる（MediaIoBaseUpload用）
+    io.BytesIO(memoryview) は全体をコピーするため、読み出したチャンク分だけを取り出す
+    """
+
+    def __init__(self, data: FileData):
+        self._view = memoryview(data).cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        chunk = self._view[self._pos:end].tobytes()
+        self._pos = max(self._pos, end)
+        return chunk
+
+    def readinto(self, b) -> int:
+        chunk = self.read(len(b))
+        b[:len(chunk)] = chunk
+        return len(chunk)
+
+
+def _upload_http() -> httplib2.Http:
+    http = getattr(_upload_local, "http", None)
+    if http is None:
+        http = httplib2.Http(timeout=UPLOAD_HTTP_TIMEOUT)
+        _upload_local.http = http
+    return http
+
+
 class AIService:
     def __init__(self):
         api_key = os.getenv("GEMINI_API_KEY")
         if api_key:
+            # transportは指定しない（SDK既定: 同期はgrpc、非同期はgrpc_asyncio）
+            # transport="grpc" を明示すると generate_content_async にも同期トランスポートが渡り、
+            # イベントループ上でブロックした上で await できない応答が返る
+            # ファイルアップロードはREST（_upload_http のスレッドごとのkeep-alive接続）を使う
             genai.configure(api_key=api_key)
         
         self.model_name = "gemini-3-flash-preview"
@@ -42,29 +448,46 @@ class AIService:
             "HARM_CATEGORY_SEXUALLY_EXPLICIT": "BLOCK_NONE",
             "HARM_CATEGORY_DANGEROUS_CONTENT": "BLOCK_NONE",
         }
+        # アセスメント各フェーズのプロンプト（マッピングファイルの更新日時をキーにキャッシュ）
+        # (mtimeキー, [(フェーズ番号, フェーズ名, フィールド数, プロンプト), ...])
+        self._phase_prompt_cache = None
+        # パース済みマッピング (mtimeキー, 読み取り専用dict)
+        self._mapping_cache = None
+        self._model = None
     
+    def warmup(self):
+        """
+        起動時ウォームアップ
+        モデル情報を1回取得してgRPCチャネル確立・認証を済ませ、初回分析のコールドスタートを避ける
+        """
+        if not os.getenv("GEMINI_API_KEY"):
+            return
+        genai.get_model(f"models/{self.model_name}")
+
     def _get_model(self):
-        return genai.GenerativeModel(
-            model_name=self.model_name,
-            generation_config=self.generation_config,
-            safety_settings=self.safety_settings
-        )
+        """GenerativeModel を初回だけ生成して使い回す（モデル名・設定はインスタンス内で固定）"""
+        if self._model is None:
+            self._model = genai.GenerativeModel(
+                model_name=self.model_name,
+                generation_config=self.generation_config,
+                safety_settings=self.safety_settings
+            )
+        return self._model
     
     def _generate_with_retry(self, prompt_parts, retries=3):
         """Rate limit対応のリトライ機能付きAPI呼び出し"""
         model = self._get_model()
         for attempt in range(retries):
+            gemini_rate_limiter.acquire()
             try:
-                return model.generate_content(prompt_parts)
+                response = model.generate_content(prompt_parts)
+                gemini_rate_limiter.on_success()
+                return response
             except Exception as e:
-                error_str = str(e)
-                if "429" in error_str or "quota" in error_str.lower():
-                    wait_time = 32
-                    match = re.search(r"retry in (\d+(\.\d+)?)s", error_str)
-                    if match:
-                        wait_time = float(match.group(1)) + 2
+                if _is_rate_limit_error(e):
+                    gemini_rate_limiter.on_rate_limited()
                     if attempt < retries - 1:
-                        time.sleep(wait_time)
+                        time.sleep(_retry_delay(str(e), attempt))
                         continue
                 raise e
 
@@ -72,134 +495,206 @@ class AIService:
         """Async version of _generate_with_retry"""
         model = self._get_model()
         for attempt in range(retries):
+            await gemini_rate_limiter.acquire_async()
             try:
                 # Use generate_content_async if available, otherwise wrap in executor
-                return await model.generate_content_async(prompt_parts)
+                response = await model.generate_content_async(prompt_parts)
+                gemini_rate_limiter.on_success()
+                return response
             except Exception as e:
-                error_str = str(e)
-                if "429" in error_str or "quota" in error_str.lower():
-                    wait_time = 32
-                    match = re.search(r"retry in (\d+(\.\d+)?)s", error_str)
-                    if match:
-                        wait_time = float(match.group(1)) + 2
+                if _is_rate_limit_error(e):
+                    gemini_rate_limiter.on_rate_limited()
                     if attempt < retries - 1:
-                        await asyncio.sleep(wait_time)
+                        await asyncio.sleep(_retry_delay(str(e), attempt))
                         continue
                 raise e
     
+    def _parse_validated(self, text: str, expect_dict: bool) -> Any:
+        """JSONをパースし、dictが必要な場合は型も検証（不正ならValueError）"""
+        result = self._parse_json_result(text)
+        if expect_dict and not isinstance(result, dict):
+            raise ValueError(f"Expected JSON object, got {type(result).__name__}")
+        return result
+
+    def _generate_json(self, prompt_parts, expect_dict: bool = False) -> Any:
+        """
+        生成してJSONとして返す
+        レート制限は _generate_with_retry が長めのバックオフで再試行し、
+        不正なJSONは待たずに「JSONのみ返す」指示を付けて再プロンプトする
+        """
+        parts = list(prompt_parts)
+        for attempt in range(VALIDATION_RETRIES + 1):
+            response = self._generate_with_retry(parts)
+            try:
+                return self._parse_validated(response.text, expect_dict)
+            except ValueError as e:
+                if attempt == VALIDATION_RETRIES:
+                    raise
+                logger.warning("Invalid JSON response (attempt %s): %s - re-prompting", attempt + 1, e)
+                if attempt == 0:
+                    parts.append(VALID_JSON_REMINDER)
+
+    async def _generate_json_async(self, prompt_parts, expect_dict: bool = False) -> Any:
+        """Async version of _generate_json"""
+        parts = list(prompt_parts)
+        for attempt in range(VALIDATION_RETRIES + 1):
+            response = await self._generate_with_retry_async(parts)
+            try:
+                return self._parse_validated(response.text, expect_dict)
+            except ValueError as e:
+                if attempt == VALIDATION_RETRIES:
+                    raise
+                logger.warning("Invalid JSON response (attempt %s): %s - re-prompting", attempt + 1, e)
+                if attempt == 0:
+                    parts.append(VALID_JSON_REMINDER)
+
     def _clean_json_response(self, text: str) -> str:
-        """JSONレスポンスのMarkdown記法を除去"""
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0].strip()
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0].strip()
-        return text
+        """JSONレスポンスのMarkdown記法を除去（partitionで最初のフェンス内だけを切り出す）"""
+        fence = "```json" if "```json" in text else "```"
+        _, found, body = text.partition(fence)
+        if not found:
+            return text
+        return body.partition("```")[0].strip()
     
     def _fix_json_string(self, text: str) -> str:
-        """文字列内の改行やエスケープ問題を修正"""
-        import re
-        lines = text.split('\n')
-        result_lines = []
-        for line in lines:
-            stripped = line.strip()
-            if stripped:
-                result_lines.append(stripped)
-        return ' '.join(result_lines)
+        """文字列内の改行やエスケープ問題を修正（改行と前後の空白をまとめて1つのスペースにする）"""
+        return _NEWLINE_WS_RE.sub(" ", text).strip()
     
     def _parse_json_result(self, text: str) -> Dict[str, Any]:
         """JSONをパースし、リストの場合は最初の要素を返す"""
-        cleaned = self._clean_json_response(text)
         try:
-            result = json.loads(cleaned)
-        except json.JSONDecodeError:
-            fixed = self._fix_json_string(cleaned)
-            result = json.loads(fixed)
+            # response_mime_type=application/json のため通常は素のJSON（コードフェンスの走査を省く）
+            result = orjson.loads(text)
+        except orjson.JSONDecodeError:
+            cleaned = self._clean_json_response(text)
+            try:
+                result = orjson.loads(cleaned)
+            except orjson.JSONDecodeError:
+                fixed = self._fix_json_string(cleaned)
+                result = orjson.loads(fixed)
         
         if isinstance(result, list) and len(result) > 0:
             return result[0]
         return result
 
-    def _upload_to_gemini(self, file_data: bytes, mime_type: str):
-        """Geminiへのファイルアップロード共通処理"""
-        # 拡張子の決定（mime_typeから）
-        suffix = ".bin"
-        if "audio" in mime_type:
-            suffix = ".m4a"
-        elif "pdf" in mime_type:
-            suffix = ".pdf"
-        elif "image" in mime_type:
-            suffix = ".jpg"
-
+    def _upload_to_gemini(self, file_data: FileData, mime_type: str):
+        """
+        Geminiへのファイルアップロード共通処理
+        genai.upload_file はパス指定のみ対応のため、同じFile APIのアップロード要求を
+        メモリ上のバッファから直接送る（一時ファイルへの書き出し・読み戻しをしない）
+        """
+        # 表示名の拡張子（mime_type → 完全一致、なければ主タイプで判定）
+        suffix = _UPLOAD_SUFFIX.get(mime_type) or _UPLOAD_SUFFIX.get(mime_type.split("/", 1)[0], ".bin")
+
+        # Note: _discovery_api / _setup_discovery_api は google-generativeai==0.8.0 の非公開API
+        # SDK更新で無くなった場合は公開APIの genai.upload_file（一時ファイル経由）で送る
+        client = get_default_file_client()
+        if hasattr(client, "_discovery_api") and hasattr(client, "_setup_discovery_api"):
+            if client._discovery_api is None:
+                client._setup_discovery_api()
+
+            media = MediaIoBaseUpload(_BufferReader(file_data), mimetype=mime_type, resumable=True)
+            result = client._discovery_api.media().upload(
+                body={"file": {"displayName": f"upload{suffix}"}},
+                media_body=media
+            ).execute(http=_upload_http())
+            uploaded_file = genai.get_file(result["file"]["name"])
+        else:
+            uploaded_file = self._upload_via_temp_file(file_data, mime_type, suffix)
+
+        # Processing待機（短い間隔から始めて徐々に延ばす）
+        poll_interval = PROCESSING_POLL_INITIAL
+        while uploaded_file.state.name == "PROCESSING":
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, PROCESSING_POLL_MAX)
+            uploaded_file = genai.get_file(uploaded_file.name)
+        return uploaded_file
+
+    def _upload_via_temp_file(self, file_data: FileData, mime_type: str, suffix: str):
+        """公開APIの genai.upload_file でアップロード（一時ファイルは送信後に削除）"""
         with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
             tmp.write(file_data)
             tmp_path = tmp.name
-        
         try:
-            uploaded_file = genai.upload_file(tmp_path, mime_type=mime_type)
-            # Processing待機
-            while uploaded_file.state.name == "PROCESSING":
-                time.sleep(1)
-                uploaded_file = genai.get_file(uploaded_file.name)
-            return uploaded_file, tmp_path
-        except Exception as e:
-            try:
-                os.unlink(tmp_path)
-            except:
-                pass
-            raise e
+            return genai.upload_file(tmp_path, mime_type=mime_type, display_name=f"upload{suffix}")
+        finally:
+            with suppress(OSError):
+                os.remove(tmp_path)
 
-    def _run_analysis(self, file_contents: list[tuple[bytes, str]], prompt: str) -> Dict[str, Any]:
+    def _run_analysis(self, file_contents: list[tuple[FileData, str]], prompt: str) -> Dict[str, Any]:
         """共通分析実行メソッド（複数ファイル対応）"""
-        uploaded_files = []
-        tmp_paths = []
+        # 全ファイルを並列アップロード
+        uploaded_files = self._upload_files_to_gemini(file_contents)
         try:
-            # 全ファイルをアップロード
-            for file_data, mime_type in file_contents:
-                uploaded_file, tmp_path = self._upload_to_gemini(file_data, mime_type)
-                uploaded_files.append(uploaded_file)
-                tmp_paths.append(tmp_path)
-            
             # 生成実行
             # 注意: extract_assessment_info以外で使われる汎用メソッド（会議録など）
-            response = self._generate_with_retry([*uploaded_files, prompt])
-            return self._parse_json_result(response.text)
+            return self._generate_json([*uploaded_files, prompt])
         finally:
-            self._cleanup_files(uploaded_files, tmp_paths)
+            self._cleanup_files(uploaded_files)
 
     # --- 公開メソッド ---
 
     # --- 内部ヘルパー: ファイル管理 ---
 
-    def _upload_files_to_gemini(self, file_contents: list[tuple[bytes, str]]) -> tuple[list[Any], list[str]]:
-        """ファイルをまとめてアップロードし、ファイルオブジェクトと一時パスを返す"""
+    def _upload_files_to_gemini(self, file_contents: list[tuple[FileData, str]]) -> list[Any]:
+        """
+        ファイルをまとめてアップロードし、ファイルオブジェクトを返す（入力と同じ順）
+        複数ファイルはスレッドで並列にアップロードし、PROCESSING待ちも同時に進める
+        """
+        if len(file_contents) <= 1:
+            return [self._upload_to_gemini(file_data, mime_type) for file_data, mime_type in file_contents]
+
+        with ThreadPoolExecutor(max_workers=min(GEMINI_UPLOAD_CONCURRENCY, len(file_contents))) as pool:
+            futures = [
+                pool.submit(self._upload_to_gemini, file_data, mime_type)
+                for file_data, mime_type in file_contents
+            ]
+
         uploaded_files = []
-        tmp_paths = []
-        try:
-            for file_data, mime_type in file_contents:
-                uploaded_file, tmp_path = self._upload_to_gemini(file_data, mime_type)
-                uploaded_files.append(uploaded_file)
-                tmp_paths.append(tmp_path)
-            return uploaded_files, tmp_paths
-        except Exception as e:
-            # 失敗時はそこまでアップロードしたものをクリーンアップして再送出
-            self._cleanup_files(uploaded_files, tmp_paths)
-            raise e
-
-    def _cleanup_files(self, uploaded_files: list[Any], tmp_paths: list[str]):
-        """Gemini上のファイルとローカル一時ファイルを削除"""
-        for uploaded_file in uploaded_files:
+        error = None
+        for future in futures:
             try:
+                uploaded_files.append(future.result())
+            except Exception as e:
+                error = error or e
+
+        if error:
+            # 失敗時は成功した分をクリーンアップして再送出
+            self._cleanup_files(uploaded_files)
+            raise error
+        return uploaded_files
+
+    def _cleanup_files(self, uploaded_files: list[Any]):
+        """Gemini上のファイルを削除（複数ある場合は並列実行）"""
+        def _delete(uploaded_file):
+            # 削除失敗（既に期限切れ等）は無視する（Geminiのファイルは48時間で自動削除される）
+            with suppress(Exception):
                 genai.delete_file(uploaded_file.name)
-            except:
-                pass
-        for tmp_path in tmp_paths:
-            try:
-                os.unlink(tmp_path)
-            except:
-                pass
 
-    def _load_all_mappings(self) -> Dict[str, Any]:
-        """mapping.txt と mapping2.txt の両方を読み込んで統合した辞書を返す"""
+        if len(uploaded_files) > 1:
+            with ThreadPoolExecutor(max_workers=min(GEMINI_UPLOAD_CONCURRENCY, len(uploaded_files))) as pool:
+                list(pool.map(_delete, uploaded_files))
+        else:
+            for uploaded_file in uploaded_files:
+                _delete(uploaded_file)
+
+    def _mapping_mtimes(self) -> tuple:
+        """マッピングファイルの更新日時（キャッシュのキー。存在しないファイルはNone）"""
+        return tuple(
+            path.stat().st_mtime_ns if path.exists() else None
+            for path in (MAPPING_FILE, MAPPING2_FILE)
+        )
+
+    def _load_all_mappings(self) -> Mapping[str, Any]:
+        """
+        mapping.txt と mapping2.txt の両方を読み込んで統合した辞書を返す
+        ファイルが更新されるまではパース済みの結果を返す（共有するため読み取り専用）
+        """
+        mtime_key = self._mapping_mtimes()
+        cached = self._mapping_cache
+        if cached and cached[0] == mtime_key:
+            return cached[1]
+
         combined_mapping = {}
         
         # Mapping 1
@@ -208,7 +703,7 @@ class AIService:
                 text = MAPPING_FILE.read_text(encoding='utf-8')
                 combined_mapping.update(MappingParser.parse_mapping(text))
             except Exception as e:
-                print(f"Failed to load mapping.txt: {e}")
+                logger.error("Failed to load mapping.txt: %s", e)
         
         # Mapping 2
         if MAPPING2_FILE.exists():
@@ -216,194 +711,48 @@ class AIService:
                 text = MAPPING2_FILE.read_text(encoding='utf-8')
                 combined_mapping.update(MappingParser.parse_mapping(text))
             except Exception as e:
-                print(f"Failed to load mapping2.txt: {e}")
-                
-        return combined_mapping
+                logger.error("Failed to load mapping2.txt: %s", e)
+
+        mapping = MappingProxyType(combined_mapping)
+        self._mapping_cache = (mtime_key, mapping)
+        return mapping
+
+    def _get_assessment_phase_prompts(self) -> list[tuple[int, str, int, str]]:
+        """
+        アセスメント各フェーズのプロンプトを返す
+        マッピングファイルの読み込み・パース・プロンプト生成は、ファイルが更新されたときだけやり直す
+        """
+        mtime_key = self._mapping_mtimes()
+        cached = self._phase_prompt_cache
+        if cached and cached[0] == mtime_key:
+            return cached[1]
+
+        full_mapping = self._load_all_mappings()
+        field_groups = self._categorize_fields(list(full_mapping.keys()))
+        phases = [
+            (i + 1, ASSESSMENT_PHASE_NAMES[i], len(fields),
+             self._generate_partial_prompt(fields, full_mapping, ASSESSMENT_PHASE_NAMES[i]))
+            for i, fields in enumerate(field_groups)
+            if fields
+        ]
+        # キーと値を1つのタプルで差し替え（並行リクエストから不整合な組を読まないように）
+        self._phase_prompt_cache = (mtime_key, phases)
+        return phases
 
     def _categorize_fields(self, all_keys: list[str]) -> list[list[str]]:
         """フィールドを13個のグループに分類する (Phase 3を2分割, Phase 10を3分割)"""
-        # G0: Basic (Admin)
-        # G1: Basic (Desc)
-        # G2: Medical (Admin) [Phase 3a]
-        # G3: Medical (History) [Phase 3b]
-        # G4: Body [Original G3]
-        # G5: Mental [Original G4]
-        # G6: ADL Major [Original G5]
-        # G7: ADL Action [Original G6]
-        # G8: IADL [Original G7]
-        # G9: Services [Original G8]
-        # G10: Housing [Phase 10a]
-        # G11: Social/Care [Phase 10b]
-        # G12: Remarks/ICF [Phase 10c]
-        
-        groups = [[] for _ in range(13)]
-        
-        # Keyword Definitions
-        
-        # G0: Basic (Admin)
-        g0_keywords = ["作成", "受付", "相談者", "利用者", "住居", "設備", "年金", "保険", "認定", "障害高齢者", "認知症高齢者", "被保険者", "氏名", "住所", "連絡先"]
-        
-        # G1: Basic (Desc)
-        g1_keywords = ["主訴", "意向", "家族", "世帯", "状況や関わり", "介護者"]
-
-        # G2: Medical (Admin) - Phase 3a
-        g2_keywords = ["健康", "病名", "薬", "受診", "主治医", "医療機関", "負担割合"]
-
-        # G3: Medical (History) - Phase 3b
-        g3_keywords = ["経緯", "搬送", "これまでの生活", "生活リズム", "状況"]
-        
-        # G4: Body (Physical)
-        g4_keywords = ["視力", "聴力", "口腔", "栄養", "身長", "体重", "血圧", "アレルギー", "麻痺", "拘縮", "痛み", "褥瘡", "体温", "脈拍", "皮膚", "感覚"]
-        
-        # G5: Mental
-        g5_keywords = ["認知機能", "行動障害", "精神", "阻害要因", "判断能力"]
-        
-        # G6: ADL Major
-        g6_keywords = ["移動", "食事", "水分", "排泄"]
-        
-        # G7: ADL Action
-        g7_keywords = ["入浴", "更衣", "整容", "寝返り", "起き上がり", "立ち上がり", "座位", "立位", "移乗"]
-        
-        # G8: IADL
-        g8_keywords = ["服薬", "調理", "掃除", "洗濯", "買物", "物品", "金銭", "コミュニケーション", "意思", "指示"]
-        
-        # G9: Services
-        g9_keywords = ["利用している支援", "社会資源", "フォーマル", "インフォーマル"]
-        
-        # G10: Housing - Phase 10a
-        g10_keywords = ["居室", "トイレ", "浴室", "住宅改修", "福祉用具", "エレベーター", "畳", "段差", "手すり", "寝具", "冷暖房", "便器", "浴槽", "シャワー", "所有形態"]
-
-        # G11: Social/Care - Phase 10b
-        g11_keywords = ["社会", "役割", "介護力", "支援", "家族支援", "生活保護", "手帳", "成人後見", "日常生活自立支援"]
-
-        # G12: Remarks/ICF - Phase 10c
-        g12_keywords = ["留意", "環境因子", "個人因子", "見通し", "方針", "虐待", "ターミナル", "医療", "審査会", "特記"]
-
-        used_keys = set()
+        groups = [[] for _ in range(len(ASSESSMENT_PHASE_NAMES))]
 
         for key in all_keys:
-            assigned = False
-            
-            # G9 (Services)
-            for kw in g9_keywords:
-                if kw in key:
-                    groups[9].append(key)
-                    used_keys.add(key)
-                    assigned = True
-                    break
-            if assigned: continue
-            
-            # G10 (Housing) - Phase 10a
-            for kw in g10_keywords:
-                if kw in key:
-                    groups[10].append(key)
-                    used_keys.add(key)
-                    assigned = True
-                    break
-            if assigned: continue
-
-            # G12 (Remarks) - Phase 10c (Check specific remarks before generic social)
-            for kw in g12_keywords:
-                if kw in key:
-                    groups[12].append(key)
-                    used_keys.add(key)
-                    assigned = True
+            # 優先順に判定し、最初にキーワードが含まれたグループに割り当てる
+            for group_index, pattern in _FIELD_GROUP_PATTERNS:
+                if pattern.search(key):
+                    groups[group_index].append(key)
                     break
-            if assigned: continue
-
-            # G11 (Social) - Phase 10b
-            for kw in g11_keywords:
-                if kw in key:
-                    groups[11].append(key)
-                    used_keys.add(key)
-                    assigned = True
-                    break
-            if assigned: continue
-
-            # G8 (IADL)
-            for kw in g8_keywords:
-                if kw in key:
-                    groups[8].append(key)
-                    used_keys.add(key)
-                    assigned = True
-                    break
-            if assigned: continue
-
-            # G6 (ADL Major)
-            for kw in g6_keywords:
-                if kw in key:
-                    groups[6].append(key)
-                    used_keys.add(key)
-                    assigned = True
-                    break
-            if assigned: continue
-
-            # G7 (ADL Action)
-            for kw in g7_keywords:
-                if kw in key:
-                    groups[7].append(key)
-                    used_keys.add(key)
-                    assigned = True
-                    break
-            if assigned: continue
-
-            # G5 (Mental)
-            for kw in g5_keywords:
-                if kw in key:
-                    groups[5].append(key)
-                    used_keys.add(key)
-                    assigned = True
-                    break
-            if assigned: continue
-
-            # G4 (Body)
-            for kw in g4_keywords:
-                if kw in key:
-                    groups[4].append(key)
-                    used_keys.add(key)
-                    assigned = True
-                    break
-            if assigned: continue
-
-            # G2 (Medical Admin) - Phase 3a
-            for kw in g2_keywords:
-                if kw in key:
-                    groups[2].append(key)
-                    used_keys.add(key)
-                    assigned = True
-                    break
-            if assigned: continue
-
-            # G3 (Medical History) - Phase 3b
-            for kw in g3_keywords:
-                if kw in key:
-                    groups[3].append(key)
-                    used_keys.add(key)
-                    assigned = True
-                    break
-            if assigned: continue
-
-            # G1 (Basic Desc)
-            for kw in g1_keywords:
-                if kw in key:
-                    groups[1].append(key)
-                    used_keys.add(key)
-                    assigned = True
-                    break
-            if assigned: continue
-
-            # G0 (Basic Admin)
-            for kw in g0_keywords:
-                if kw in key:
-                    groups[0].append(key)
-                    used_keys.add(key)
-                    assigned = True
-                    break
-            if assigned: continue
-            
-            # Fallback to Remarks (G12)
-            groups[12].append(key)
-        
+            else:
+                # Fallback to Remarks (G12)
+                groups[FALLBACK_FIELD_GROUP].append(key)
+
         return groups
 
     def _generate_partial_prompt(self, fields: list[str], mapping_dict: Dict[str, Any], phase_name: str) -> str:
@@ -513,112 +862,56 @@ JSON形式で、上記リストの項目名をキーとして出力してくだ
 値が見つからない場合は空文字 "" にしてください（推測で埋めないでください）。
 """
 
-    async def extract_assessment_info(self, file_contents: list[tuple[bytes, str]]) -> Dict[str, Any]:
-        """アセスメント情報を13段階で抽出して統合 (Async/Parallel Version)"""
+    async def extract_assessment_info(self, file_contents: list[tuple[FileData, str]]) -> Dict[str, Any]:
+        """
+        アセスメント情報を13段階で抽出して統合 (Async/Parallel Version)
+        一部のフェーズが失敗した場合は PartialAssessmentError（部分結果付き）を送出する
+        """
         
-        # 1. 準備：マッピング読み込みとグループ化
-        full_mapping = self._load_all_mappings()
-        all_keys = list(full_mapping.keys())
-        field_groups = self._categorize_fields(all_keys)
-        # Note: phase_names must match the 13 groups returned by _categorize_fields
-        phase_names = [
-            "基本情報・社会基盤（氏名、住所、認定情報など）",
-            "基本情報・詳細（主訴、家族状況、意向など）",
-            "医療・管理（病名、受診状況、保険情報など）",         # Phase 3a
-            "経歴・生活史（生活リズム、これまでの経緯など）",        # Phase 3b
-            "心身機能（身体状況・麻痺・拘縮・痛み・皮膚・感覚など）", # Phase 4 -> 5
-            "精神・認知機能（認知症、BPSD、精神症状、判断能力など）", # Phase 5 -> 6
-            "身体ADL・主要（移動、食事、排泄）",                   # Phase 6 -> 7
-            "身体ADL・動作（入浴、更衣、移乗、姿勢保持など）",       # Phase 7 -> 8
-            "IADL・認知・伝達（家事、金銭管理、コミュニケーション）", # Phase 8 -> 9
-            "サービスの利用状況・社会資源",                        # Phase 9 -> 10
-            "住環境・設備（家屋構造、住宅改修、福祉用具など）",     # Phase 10a -> 11
-            "社会・介護力（社会参加、役割、家族支援など）",         # Phase 10b -> 12
-            "留意事項・方針・見通し・ICF（環境・個人因子など）"      # Phase 10c -> 13
-        ]
+        # 1. 準備：フェーズごとのプロンプト（マッピングが変わらない限りキャッシュを使用）
+        phases = self._get_assessment_phase_prompts()
 
         master_result = {}
         
-        # 2. ファイルアップロード（1回のみ）
-        uploaded_files, tmp_paths = self._upload_files_to_gemini(file_contents)
+        # 2. ファイルアップロード（1回のみ、PROCESSING待機でブロックするためスレッドで実行）
+        uploaded_files = await asyncio.to_thread(self._upload_files_to_gemini, file_contents)
         
         try:
             # 3. 8段階の並列実行
             tasks = []
             valid_phases = [] # Keep track of which phase corresponds to which task
             
-            for i, fields in enumerate(field_groups):
-                if not fields:
-                    continue
+            for phase_num, phase_name, field_count, prompt in phases:
+                logger.debug("Preparing Assessment Phase %s/%s: %s (%s fields)", phase_num, len(ASSESSMENT_PHASE_NAMES), phase_name, field_count)
                 
-                print(f"DEBUG: Preparing Assessment Phase {i+1}/8: {phase_names[i]} ({len(fields)} fields)", flush=True)
-                
-                # プロンプト生成 (Sync operation is fast)
-                prompt = self._generate_partial_prompt(fields, full_mapping, phase_names[i])
-                
-                # Create Task
-                task = self._generate_with_retry_async([*uploaded_files, prompt])
+                # Create Task（不正なJSON・dict以外の結果はタスク内で再プロンプトされる）
+                task = self._generate_json_async([*uploaded_files, prompt], expect_dict=True)
                 tasks.append(task)
-                valid_phases.append(i + 1)
+                valid_phases.append(phase_num)
 
-            print(f"DEBUG: Executing {len(tasks)} phases in parallel...", flush=True)
-            responses = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Process Results with Retry for Parse Failures
-            failed_phases = []  # (phase_num, prompt) for retry
-            prompt_map = {}  # Store prompts for potential retry
+            logger.debug("Executing %s phases in parallel...", len(tasks))
+            results = await asyncio.gather(*tasks, return_exceptions=True)
             
-            # First pass: Process all responses
-            for idx, response in enumerate(responses):
-                phase_num = valid_phases[idx]
-                if isinstance(response, Exception):
-                    print(f"ERROR: Phase {phase_num} API failed: {response}", flush=True)
+            failed_phases = []
+            for phase_num, partial_result in zip(valid_phases, results):
+                if isinstance(partial_result, Exception):
+                    logger.error("Phase %s failed: %s", phase_num, partial_result)
+                    failed_phases.append(phase_num)
                 else:
-                    try:
-                        partial_result = self._parse_json_result(response.text)
-                        if isinstance(partial_result, dict):
-                            master_result.update(partial_result)
-                            print(f"DEBUG: Phase {phase_num} completed. Merged {len(partial_result)} keys.", flush=True)
-                        else:
-                            print(f"WARNING: Phase {phase_num} returned non-dict result", flush=True)
-                            failed_phases.append((phase_num, idx))
-                    except Exception as e:
-                        print(f"ERROR: Phase {phase_num} parse failed: {e} - Will retry", flush=True)
-                        failed_phases.append((phase_num, idx))
-            
-            # Retry Logic (max 2 attempts per failed phase)
-            max_retries = 2
-            for phase_num, original_idx in failed_phases:
-                # Reconstruct prompt for this phase
-                i = phase_num - 1
-                if i >= len(field_groups):
-                    continue
-                fields = field_groups[i]
-                prompt = self._generate_partial_prompt(fields, full_mapping, phase_names[i])
-                
-                for attempt in range(1, max_retries + 1):
-                    print(f"DEBUG: Retrying Phase {phase_num} (attempt {attempt}/{max_retries})...", flush=True)
-                    try:
-                        await asyncio.sleep(1)  # Small delay before retry
-                        retry_response = await self._generate_with_retry_async([*uploaded_files, prompt])
-                        partial_result = self._parse_json_result(retry_response.text)
-                        if isinstance(partial_result, dict):
-                            master_result.update(partial_result)
-                            print(f"DEBUG: Phase {phase_num} RETRY successful. Merged {len(partial_result)} keys.", flush=True)
-                            break  # Success, exit retry loop
-                    except Exception as e:
-                        print(f"ERROR: Phase {phase_num} retry {attempt} failed: {e}", flush=True)
-                        if attempt == max_retries:
-                            print(f"ERROR: Phase {phase_num} exhausted all retries.", flush=True)
+                    master_result.update(partial_result)
+                    logger.debug("Phase %s completed. Merged %s keys.", phase_num, len(partial_result))
 
+            # 失敗したフェーズがあれば部分結果を付けて送出（欠けた結果がキャッシュされないように）
+            if failed_phases:
+                raise PartialAssessmentError(master_result, failed_phases)
             return master_result
 
         finally:
             # 4. クリーンアップ
-            self._cleanup_files(uploaded_files, tmp_paths)
+            await asyncio.to_thread(self._cleanup_files, uploaded_files)
 
     # 互換性ラッパー (Sync) - 非推奨だが残す
-    def extract_assessment_info_sync(self, file_contents: list[tuple[bytes, str]]) -> Dict[str, Any]:
+    def extract_assessment_info_sync(self, file_contents: list[tuple[FileData, str]]) -> Dict[str, Any]:
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         return loop.run_until_complete(self.extract_assessment_info(file_contents))
@@ -634,182 +927,40 @@ JSON形式で、上記リストの項目名をキーとして出力してくだ
         return self.extract_assessment_info([(audio_data, "audio/mp4")])
 
     # 会議系（音声/PDF/画像対応に拡張。引数名は後方互換でfile_dataを想定）
-    def generate_meeting_summary(self, file_contents: list[tuple[bytes, str]]) -> Dict[str, Any]:
+    def generate_meeting_summary(self, file_contents: list[tuple[FileData, str]]) -> Dict[str, Any]:
         """会議録を生成（汎用、複数ファイル統合）"""
-        prompt = """
-あなたはケアマネジメントの専門家であり、医療・福祉分野のプロの記録担当者です。
-アップロードされたデータ（複数ファイル可）を注意深く分析し、統合して1つの公式な会議録を作成します。
+        return self._run_analysis(file_contents, MEETING_SUMMARY_PROMPT)
 
-出力形式は以下のJSONです：
-{
-  "開催日": "日付",
-  "開催場所": "場所",
-  "開催時間": "時間",
-  "開催回数": "回数",
-  "担当者名": "名前",
-  "利用者名": "名前",
-  "検討内容": "詳細な会議録テキスト",
-  "検討した項目": "会議の目的、暫定プラン、重要事項",
-  "結論": "決定事項リスト"
-}
-"""
-        return self._run_analysis(file_contents, prompt)
-
-    def generate_management_meeting_summary(self, file_contents: list[tuple[bytes, str]]) -> Dict[str, Any]:
+    def generate_management_meeting_summary(self, file_contents: list[tuple[FileData, str]]) -> Dict[str, Any]:
         """運営会議専用プロンプト（care-dx-app互換、複数ファイル統合）"""
-        prompt = """
-あなたは、医療・福祉分野のプロの記録担当者です。
-入力されたデータ（会議の音声、または記録書類など複数可）を分析・統合し、以下の情報を抽出・整理して、**JSON形式**で出力してください。
-
-## 出力するJSONのキーと作成ルール
-
-1. "agenda" (議題項目)
-   - 以下の議題リストを確認し、話された内容が含まれていれば行末に「●」を付けてください。
-   - 形式はリスト形式ではなく、改行を含む1つのテキスト文字列としてください。
-   【議題リストテンプレート】
-   ①現に抱える処遇困難ケースについて
-   ②過去に取り扱ったケースについての問題点及びその改善方策
-   ③地域における事業所や活用できる社会資源の状況
-   ④保健医療及び福祉に関する諸制度
-   ⑤ケアマネジメントに関する技術
-   ⑥利用者からの苦情があった場合は、その内容及び改善方針
-   ⑦その他必要な事項
-
-2. "support_24h" (24時間対応)
-3. "sharing_matters" (共有事項)
-   - 形式:
-     ■利用者情報共有
-     　...
-     ■その他共有事項
-     　...
-
-## 出力例 (JSON)
-{
-  "agenda": "①現に抱える処遇困難ケースについて●\\n②過去に取り扱ったケースについての問題点及びその改善方策\\n...",
-  "support_24h": "12/5 18:00 佐藤対応: 〇〇様転倒により救急搬送。入院となる。",
-  "sharing_matters": "■利用者情報共有\\n〇武島（ケアマネ）：宮城様 老健退所後の自宅生活...\\n\\n■その他共有事項\\n〇リハビリ：松浦クリニックでの利用が可能か..."
-}
-"""
-        return self._run_analysis(file_contents, prompt)
+        return self._run_analysis(file_contents, MANAGEMENT_MEETING_PROMPT)
 
-    def generate_service_meeting_summary(self, file_contents: list[tuple[bytes, str]]) -> Dict[str, Any]:
+    def generate_service_meeting_summary(self, file_contents: list[tuple[FileData, str]]) -> Dict[str, Any]:
         """サービス担当者会議専用プロンプト（care-dx-app互換、複数ファイル統合）"""
-        prompt = """
-あなたはケアマネジメントの専門家であり、医療・福祉分野のプロの記録担当者です。
-アップロードされたデータ（複数ファイル可）を注意深く分析し、統合して1つの公式な会議録を作成します。
-あなたのタスクは、入力データ全体の内容を完全に理解・把握し、以下の【統合出力フォーマット】に厳密に従って会議録をまとめることです。
-
-# 出力要件
-以下のキーを持つJSONオブジェクトを出力してください。
-値はマークダウンを含まないプレーンテキストにしてください。
-改行は \\n で表現してください。
-
-JSONキー仕様:
-- "検討内容": 【統合出力フォーマット】に従った詳細な会議録テキスト
-- "検討した項目": 会議の目的、暫定プラン、重要事項をまとめたテキスト
-- "結論": 決定事項、今後の方針、モニタリング点などを箇条書き6~8項目程度
-
-# 【統合出力フォーマット】（検討内容の形式）
-①【本人及び家族の意向】...
-②【心身・生活状況】...
-③【会議の結論・ケアプラン詳細】...
-④【各事業所の役割分担と確認事項】...
-⑤【福祉用具・住宅改修等に関する検討事項】...
-
-**必須要件**：結論には必ず「サービス担当へ、個別援助計画書の提出を依頼する」という文言を含めてください。
-"""
-        response = self._run_analysis(file_contents, prompt)
+        response = self._run_analysis(file_contents, SERVICE_MEETING_PROMPT)
         
-        # 必須文言の強制追加
-        mandatory_text = "サービス担当へ、個別援助計画書の提出を依頼する"
-        if "結論" in response:
-            if mandatory_text not in response["結論"]:
-                response["結論"] = response["結論"] + "\n・" + mandatory_text
+        # 必須文言の強制追加（部分一致の判定はC実装の1回の走査で済み、欠けている場合のみ連結する）
+        conclusion = response.get("結論")
+        if isinstance(conclusion, str):
+            if SERVICE_MEETING_MANDATORY_TEXT not in conclusion:
+                response["結論"] = f"{conclusion}\n・{SERVICE_MEETING_MANDATORY_TEXT}"
+        elif isinstance(conclusion, list):
+            # 箇条書きを配列で返された場合は要素として追加
+            if not any(SERVICE_MEETING_MANDATORY_TEXT in str(item) for item in conclusion):
+                conclusion.append(SERVICE_MEETING_MANDATORY_TEXT)
         
         return response
 
-    def extract_qa_from_audio(self, file_contents: list[tuple[bytes, str]]) -> Dict[str, Any]:
+    def extract_qa_from_audio(self, file_contents: list[tuple[FileData, str]]) -> Dict[str, Any]:
         """Q&A抽出"""
-        prompt = """
-提供されたデータを質問と回答のペアとして抽出してください。
-出力形式：
-{
-  "qa_pairs": [
-    {"question": "質問1", "answer": "回答1"},
-    {"question": "質問2", "answer": "回答2"}
-  ]
-}
-"""
-        return self._run_analysis(file_contents, prompt)
+        return self._run_analysis(file_contents, QA_PROMPT)
 
     def generate_genogram_data(self, text: str) -> Dict[str, Any]:
         """テキストからジェノグラムデータを生成"""
-        prompt = f"""
-以下のテキストから家族構成と関係性を抽出し、厳密に指定されたJSON形式で出力してください。
-
-テキスト: {text}
-
-## 出力ルール
-1. **JSON形式**で出力し、キー `nodes` と `edges` を含めること。
-2. `nodes`: 各人物のリスト。
-   - `id`: 一意のID文字列 (例: "p1", "p2")
-   - `data`: {{ "label": "氏名または続柄", "gender": "male" または "female", "deceased": true/false }}
-   - `type`: "person" (固定)
-   - `position`: {{ "x": 0, "y": 0 }} (すべて0でよい)
-3. `edges`: 関係性のリスト。
-   - `id`: 一意のID文字列 (例: "e1")
-   - `source`: 関係元の `id`
-   - `target`: 関係先の `id`
-   - `type`: "marriage" (婚姻/事実婚) または "smoothstep" (親子などそれ以外)
-   - `data`: もしあれば関係の詳細 (例: {{ "label": "離婚" }})
-
-## 出力例
-{{
-  "nodes": [
-    {{ "id": "p1", "type": "person", "data": {{ "label": "本人", "gender": "female", "deceased": false }}, "position": {{ "x": 0, "y": 0 }} }},
-    {{ "id": "p2", "type": "person", "data": {{ "label": "長男", "gender": "male", "deceased": false }}, "position": {{ "x": 0, "y": 0 }} }}
-  ],
-  "edges": [
-    {{ "id": "e1", "source": "p1", "target": "p2", "type": "smoothstep" }}
-  ]
-}}
-"""
-        response = self._generate_with_retry([prompt])
-        text = self._clean_json_response(response.text)
-        return json.loads(text)
+        prompt = GENOGRAM_PROMPT_TEMPLATE.format(text=text)
+        return self._generate_json([prompt], expect_dict=True)
     
     def generate_bodymap_data(self, text: str) -> Dict[str, Any]:
         """テキストから身体図データを生成"""
-        prompt = f"""
-以下のテキストから身体状況（マヒ、欠損、機能低下、痛みなど）を抽出し、指定されたJSON形式で出力してください。
-
-テキスト: {text}
-
-## ルール
-1. `findings` というキーを持つJSONオブジェクトを出力してください。
-2. 各findingには以下の要素を含めてください。
-   - `part`: 部位キー (**必ず以下のリストから選択すること**)
-     - head, face, neck
-     - shoulder (肩全体), right_shoulder, left_shoulder
-     - chest (胸部), stomach (腹部)
-     - back (背部), hip (臀部/腰)
-     - arm (腕全体), hand (手)
-     - leg (足全体), right_leg, left_leg
-   - `condition`: 状態の説明 (日本語可。例: "右片麻痺", "褥瘡")
-   - `note`: 詳細なコメント (日本語可)
-
-## 注意
-- 部位 (`part`) は英語のキーである必要があります。「右腕」なら `arm` ではなく `arm` (位置指定がない場合) または近いものを選んでください。迷ったら `chest` (中心) にし、`note`で補足してください。
-- 複数の症状がある場合は、複数のfindingを作成してください。
-
-## 出力例
-{{
-  "findings": [
-    {{ "part": "right_shoulder", "condition": "拘縮", "note": "可動域制限あり" }},
-    {{ "part": "stomach", "condition": "手術痕", "note": "盲腸の手術痕あり" }}
-  ]
-}}
-"""
-        response = self._generate_with_retry([prompt])
-        text = self._clean_json_response(response.text)
-        return json.loads(text)
+        prompt = BODYMAP_PROMPT_TEMPLATE.format(text=text)
+        return self._generate_json([prompt], expect_dict=True)
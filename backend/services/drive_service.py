@@ -1,21 +1,63 @@
 import os
+import logging
 import io
 import datetime
 import json
+import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import httplib2
+import google_auth_httplib2
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseUpload
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union, BinaryIO, List
+
+logger = logging.getLogger("kakanai")
 
 SCOPES = ['https://www.googleapis.com/auth/drive']
 
+# レジューマブルアップロードのチャンクサイズ（8MB）
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# httplib2.Http はスレッドセーフではないため、スレッドごとに1つ作って使い回す
+HTTP_TIMEOUT = 120
+
+# 複数ファイルを一度にアップロードする際の同時送信数
+# （Drive APIのバッチリクエストはメディアアップロード非対応のため、スレッドで並列送信する）
+UPLOAD_CONCURRENCY = 4
+
 class DriveService:
     def __init__(self):
         self.creds = self._get_credentials()
         self.service = None
+        self._local = threading.local()
+
+        # フォルダ・テンプレートIDは起動時に確定させ、リクエストごとに環境変数を読まない
+        self._folder_ids = {
+            "management_meeting": "1qp-QG3xznoj1tCbfkWaHL5TAPsLy2DE5", # 運営会議
+            "service_meeting": "17HIIJUFlCcMuSHiZZ8nD4pzb4LnAijHO", # サービス担当者会議
+            "assessment": os.getenv("GOOGLE_DRIVE_ASSESSMENT_FOLDER_ID"), # アセスメント（新規作成用フォルダ）
+        }
+        self._template_ids = {
+            "assessment": os.getenv("GOOGLE_SHEETS_ASSESSMENT_TEMPLATE_ID"),
+        }
         if self.creds:
             self.service = build('drive', 'v3', credentials=self.creds)
 
+    def _http(self):
+        """
+        スレッドごとの認証済みHTTPクライアント（接続・トークンを再利用）
+        serviceは共有し、execute(http=...) で呼び出しスレッドのものを渡す
+        """
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(
+                self.creds, http=httplib2.Http(timeout=HTTP_TIMEOUT)
+            )
+            self._local.http = http
+        return http
+
     def _get_credentials(self):
         """
         環境変数 GOOGLE_SERVICE_ACCOUNT_JSON または BASE64 から認証情報を取得
@@ -40,21 +82,20 @@ class DriveService:
                         raw_key = raw_key.replace("END PRIVATEKEY", "END PRIVATE KEY")
                     service_account_info["private_key"] = raw_key
             except Exception as e:
-                print(f"Failed to parse GOOGLE_SERVICE_ACCOUNT_JSON in DriveService: {e}")
+                logger.error("Failed to parse GOOGLE_SERVICE_ACCOUNT_JSON in DriveService: %s", e)
 
         # 2. Base64 (Fallback)
         if not service_account_info:
             sa_base64 = os.getenv("GOOGLE_SERVICE_ACCOUNT_BASE64")
             if sa_base64:
                 try:
-                    import base64
                     decoded = base64.b64decode(sa_base64)
                     service_account_info = json.loads(decoded.decode('utf-8'))
                      # 秘密鍵正規化
                     if "private_key" in service_account_info:
                         service_account_info["private_key"] = service_account_info["private_key"].replace("\\n", "\n")
                 except Exception as e:
-                    print(f"Failed to parse Base64 creds in DriveService: {e}")
+                    logger.error("Failed to parse Base64 creds in DriveService: %s", e)
 
         # 3. Local File (Dev)
         if not service_account_info:
@@ -73,17 +114,18 @@ class DriveService:
             )
         return None
 
-    def upload_file(self, file_content: bytes, filename: str, mime_type: str, folder_id: str) -> Tuple[bool, Optional[str]]:
+    def upload_file(self, file_content: Union[bytes, BinaryIO], filename: str, mime_type: str, folder_id: str) -> Tuple[bool, Optional[str]]:
         """
         ファイルを指定フォルダにアップロード
+        file_content は bytes またはファイルライクオブジェクト（チャンク単位で送信）
         Returns: (success, web_view_link)
         """
         if not self.service:
-            print("Drive Service not initialized")
+            logger.warning("Drive Service not initialized")
             return False, None
 
         if not folder_id:
-            print("No folder_id provided for upload")
+            logger.warning("No folder_id provided for upload")
             return False, None
 
         try:
@@ -96,10 +138,15 @@ class DriveService:
                 'parents': [folder_id]
             }
 
+            # アップロード直前にだけラップする（bytes を渡した BytesIO は書き込むまでバッファを共有しコピーしない）
+            if isinstance(file_content, (bytes, bytearray)):
+                file_content = io.BytesIO(file_content)
+
             media = MediaIoBaseUpload(
-                io.BytesIO(file_content),
+                file_content,
                 mimetype=mime_type,
-                resumable=True
+                resumable=True,
+                chunksize=UPLOAD_CHUNK_SIZE
             )
 
             file = self.service.files().create(
@@ -107,15 +154,30 @@ class DriveService:
                 media_body=media,
                 fields='id, webViewLink',
                 supportsAllDrives=True
-            ).execute()
+            ).execute(http=self._http())
 
-            print(f"Uploaded file to Drive: {new_filename} (ID: {file.get('id')})")
+            logger.info("Uploaded file to Drive: %s (ID: %s)", new_filename, file.get('id'))
             return True, file.get('webViewLink')
 
         except Exception as e:
-            print(f"Failed to upload to Drive: {e}")
+            logger.error("Failed to upload to Drive: %s", e)
             return False, None
 
+    def upload_files(self, items: List[Tuple[Union[bytes, BinaryIO], str, str]], folder_id: str) -> List[Tuple[bool, Optional[str]]]:
+        """
+        複数ファイルを同じフォルダに並列アップロード
+        items: [(file_content, filename, mime_type), ...]
+        Returns: 各ファイルの (success, web_view_link)（items と同じ順）
+        """
+        if len(items) <= 1:
+            return [self.upload_file(content, filename, mime_type, folder_id) for content, filename, mime_type in items]
+
+        with ThreadPoolExecutor(max_workers=min(UPLOAD_CONCURRENCY, len(items))) as pool:
+            return list(pool.map(
+                lambda item: self.upload_file(item[0], item[1], item[2], folder_id),
+                items
+            ))
+
     def copy_spreadsheet(self, template_id: str, new_name: str, folder_id: str = None) -> Tuple[Optional[str], Optional[str]]:
         """
         スプレッドシートをコピーして新規作成
@@ -135,13 +197,13 @@ class DriveService:
                 body=body,
                 fields='id, webViewLink, name',
                 supportsAllDrives=True
-            ).execute()
+            ).execute(http=self._http())
             
-            print(f"Created new spreadsheet: {new_file.get('name')} (ID: {new_file.get('id')})")
+            logger.info("Created new spreadsheet: %s (ID: %s)", new_file.get('name'), new_file.get('id'))
             return new_file.get('id'), new_file.get('webViewLink')
 
         except Exception as e:
-            print(f"Failed to copy spreadsheet: {e}")
+            logger.error("Failed to copy spreadsheet: %s", e)
             return None, None
 
     def create_empty_spreadsheet(self, title: str, folder_id: str) -> Tuple[Optional[str], Optional[str]]:
@@ -150,7 +212,7 @@ class DriveService:
         Returns: (spreadsheet_id, web_view_link)
         """
         if not self.service:
-            print("Drive Service not initialized")
+            logger.warning("Drive Service not initialized")
             return None, None
 
         try:
@@ -164,30 +226,22 @@ class DriveService:
                 body=file_metadata,
                 fields='id, webViewLink',
                 supportsAllDrives=True
-            ).execute()
+            ).execute(http=self._http())
             
-            print(f"Created empty spreadsheet: {title} (ID: {file.get('id')})")
+            logger.info("Created empty spreadsheet: %s (ID: %s)", title, file.get('id'))
             return file.get('id'), file.get('webViewLink')
 
         except Exception as e:
-            print(f"Failed to create empty spreadsheet: {e}")
+            logger.error("Failed to create empty spreadsheet: %s", e)
             return None, None
 
     def get_folder_id_by_type(self, meeting_type: str) -> Optional[str]:
-        """会議タイプに応じたフォルダIDを環境変数から取得"""
-        if meeting_type == "management_meeting": # 運営会議
-            return "1qp-QG3xznoj1tCbfkWaHL5TAPsLy2DE5"
-        elif meeting_type == "service_meeting": # サービス担当者会議
-            return "17HIIJUFlCcMuSHiZZ8nD4pzb4LnAijHO"
-        elif meeting_type == "assessment": # アセスメント（新規作成用フォルダ）
-             return os.getenv("GOOGLE_DRIVE_ASSESSMENT_FOLDER_ID")
-        return None
+        """会議タイプに応じたフォルダIDを取得（起動時に確定した値を参照）"""
+        return self._folder_ids.get(meeting_type)
 
     def get_template_id_by_type(self, meeting_type: str) -> Optional[str]:
          """テンプレートID取得"""
-         if meeting_type == "assessment":
-             return os.getenv("GOOGLE_SHEETS_ASSESSMENT_TEMPLATE_ID")
-         return None
+         return self._template_ids.get(meeting_type)
 
 # Singleton instance
 drive_service = DriveService()
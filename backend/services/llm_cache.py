@@ -0,0 +1,145 @@
+"""
+LLM Cache Service - AI分析結果のキャッシュ
+同一入力（モデル・分析タイプ・入力データ）に対するGemini呼び出しを省略する
+REDIS_URL があればRedis、なければローカルディスク（所有者のみ読み書き可）に保存
+"""
+import os
+import logging
+import time
+import asyncio
+import uuid
+import hashlib
+import tempfile
+import orjson
+from pathlib import Path
+from typing import Any, Optional
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger("kakanai")
+
+# プロンプトやモデル設定を変更した場合はバージョンを上げて旧キャッシュを無効化する
+CACHE_VERSION = "1"
+DEFAULT_TTL = 7 * 24 * 3600  # 7日
+CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", Path(tempfile.gettempdir()) / "kakanai_llm_cache"))
+# ディスクキャッシュの最大件数（超えたら最後に使われた日時が古いものから削除するLRU）
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+
+
+def make_cache_key(*parts) -> str:
+    """
+    入力（str / bytes）からキャッシュキー(sha256)を生成
+    各パートは長さ付きで連結し、区切り位置の違いによる衝突を防ぐ
+    """
+    h = hashlib.sha256(CACHE_VERSION.encode())
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        h.update(len(part).to_bytes(8, "big"))
+        h.update(part)
+    return h.hexdigest()
+
+
+class LLMCache:
+    def __init__(self):
+        self.enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+        self.redis = None
+        self._dir_ready = False
+
+        redis_url = os.getenv("REDIS_URL")
+        if self.enabled and redis_url:
+            if aioredis:
+                self.redis = aioredis.from_url(redis_url)
+            else:
+                logger.warning("REDIS_URL is set but redis package is not installed. Using disk cache.")
+
+    async def get(self, key: str) -> Optional[Any]:
+        """キャッシュを取得（なければNone）"""
+        if not self.enabled:
+            return None
+        try:
+            if self.redis:
+                raw = await self.redis.get(f"llm:{key}")
+                return orjson.loads(raw) if raw else None
+            return await asyncio.to_thread(self._disk_get, key)
+        except Exception as e:
+            logger.error("LLM cache get failed: %s", e)
+            return None
+
+    async def set(self, key: str, value: Any, ttl: int = DEFAULT_TTL) -> None:
+        """キャッシュを保存（失敗しても処理は継続）"""
+        if not self.enabled:
+            return
+        try:
+            if self.redis:
+                await self.redis.set(f"llm:{key}", orjson.dumps(value), ex=ttl)
+            else:
+                await asyncio.to_thread(self._disk_set, key, value, ttl)
+        except Exception as e:
+            logger.error("LLM cache set failed: %s", e)
+
+    # --- ディスクキャッシュ ---
+
+    def _disk_path(self, key: str) -> Path:
+        return CACHE_DIR / f"{key}.json"
+
+    def _ensure_cache_dir(self) -> None:
+        """
+        キャッシュディレクトリを本プロセスのユーザー専用(0700)で用意する
+        分析結果には個人情報（氏名・家族・病歴など）が含まれるため、共有の /tmp 配下でも他ユーザーに読ませない
+        """
+        if self._dir_ready:
+            return
+        CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if hasattr(os, "getuid") and CACHE_DIR.stat().st_uid != os.getuid():
+            raise PermissionError(f"LLM cache dir {CACHE_DIR} is owned by another user")
+        os.chmod(CACHE_DIR, 0o700)
+        self._dir_ready = True
+
+    def _disk_get(self, key: str) -> Optional[Any]:
+        self._ensure_cache_dir()
+        path = self._disk_path(key)
+        if not path.exists():
+            return None
+        entry = orjson.loads(path.read_bytes())
+        if entry["expires_at"] < time.time():
+            path.unlink(missing_ok=True)
+            return None
+        # 最終利用日時を更新（LRUの削除順に使う）
+        os.utime(path)
+        return entry["value"]
+
+    def _disk_set(self, key: str, value: Any, ttl: int) -> None:
+        self._ensure_cache_dir()
+        path = self._disk_path(key)
+        tmp_path = CACHE_DIR / f"{key}.{uuid.uuid4().hex}.tmp"
+        entry = {"expires_at": time.time() + ttl, "value": value}
+        # 所有者のみ読み書き可(0600)で新規作成する
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(orjson.dumps(entry))
+        # 書き込み途中のファイルを読まれないようにアトミックに置き換え
+        os.replace(tmp_path, path)
+        self._disk_prune()
+
+    def _disk_prune(self) -> None:
+        """件数が上限を超えていれば、最終利用日時が古いエントリから削除"""
+        entries = []
+        for entry_path in CACHE_DIR.glob("*.json"):
+            try:
+                entries.append((entry_path.stat().st_mtime, entry_path))
+            except FileNotFoundError:
+                continue
+        excess = len(entries) - CACHE_MAX_ENTRIES
+        if excess <= 0:
+            return
+        entries.sort()
+        for _, entry_path in entries[:excess]:
+            entry_path.unlink(missing_ok=True)
+
+
+# Singleton instance
+llm_cache = LLMCache()
@@ -2,12 +2,20 @@
 Sheets Service - Google Sheets統合（マッピング対応版）
 """
 import gspread
+import gspread.utils
+from google.auth.transport.requests import AuthorizedSession
+from requests.adapters import HTTPAdapter
 from oauth2client.service_account import ServiceAccountCredentials
 import os
+import logging
 import json
 import re
+import datetime
 from pathlib import Path
 from typing import Dict, Any, List, Optional
+from .drive_service import drive_service
+
+logger = logging.getLogger("kakanai")
 
 # マッピングファイルのパス
 CONFIG_DIR = Path(__file__).parent.parent / "config"
@@ -21,6 +29,20 @@ SCOPES = [
     'https://www.googleapis.com/auth/drive'
 ]
 
+# Sheets API への接続プール（to_thread で並行に呼ばれるため、既定の10より大きく確保）
+HTTP_POOL_SIZE = 32
+
+
+def _authorize(credentials) -> gspread.Client:
+    """
+    keep-alive の接続プール付きセッションで gspread クライアントを作成
+    （同一ホストへの連続したAPI呼び出しでTLSハンドシェイクを再利用する）
+    """
+    session = AuthorizedSession(credentials)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    return gspread.Client(credentials, session=session)
+
 
 class SheetsService:
     def __init__(self):
@@ -43,26 +65,25 @@ class SheetsService:
         
         if service_account_json:
             try:
-                print("DEBUG: Found GOOGLE_SERVICE_ACCOUNT_JSON", flush=True)
+                logger.debug("Found GOOGLE_SERVICE_ACCOUNT_JSON")
                 service_account_info = json.loads(service_account_json)
                 
                 if "private_key" in service_account_info:
                     raw_key = service_account_info["private_key"]
-                    # Log key format for debugging (safe subset)
-                    print(f"DEBUG: Private Key Start: {repr(raw_key[:50])}", flush=True)
-                    print(f"DEBUG: Private Key Length: {len(raw_key)}", flush=True)
+                    # Log key format for debugging (length only, never key material)
+                    logger.debug("Private Key Length: %s", len(raw_key))
                     
                     if "\\n" in raw_key:
-                        print("DEBUG: Normalizing private key newlines", flush=True)
+                        logger.debug("Normalizing private key newlines")
                         service_account_info["private_key"] = raw_key.replace("\\n", "\n")
                     else:
-                        print("DEBUG: Private key does not contain literal \\n. Treating as valid or already normalized.", flush=True)
+                        logger.debug("Private key does not contain literal \\n. Treating as valid or already normalized.")
 
-                print(f"DEBUG: Service Account Email: {service_account_info.get('client_email')}", flush=True)
-                print(f"DEBUG: Project ID: {service_account_info.get('project_id')}", flush=True)
-                print("DEBUG: Successfully parsed JSON", flush=True)
+                logger.debug("Service Account Email: %s", service_account_info.get('client_email'))
+                logger.debug("Project ID: %s", service_account_info.get('project_id'))
+                logger.debug("Successfully parsed JSON")
             except Exception as e:
-                print(f"Failed to parse GOOGLE_SERVICE_ACCOUNT_JSON: {e}", flush=True)
+                logger.error("Failed to parse GOOGLE_SERVICE_ACCOUNT_JSON: %s", e)
 
         # 2. Base64エンコードされた環境変数から認証（フォールバック）
         if not service_account_info:
@@ -70,7 +91,7 @@ class SheetsService:
             if service_account_base64:
                 try:
                     import base64
-                    print("DEBUG: Found GOOGLE_SERVICE_ACCOUNT_BASE64", flush=True)
+                    logger.debug("Found GOOGLE_SERVICE_ACCOUNT_BASE64")
                     service_account_base64 = service_account_base64.strip()
                     decoded_bytes = base64.b64decode(service_account_base64)
                     service_account_info = json.loads(decoded_bytes.decode('utf-8'))
@@ -79,46 +100,44 @@ class SheetsService:
                     if "private_key" in service_account_info:
                         service_account_info["private_key"] = service_account_info["private_key"].replace("\\n", "\n")
                         
-                    print("DEBUG: Successfully parsed Base64", flush=True)
+                    logger.debug("Successfully parsed Base64")
                 except Exception as e:
-                    print(f"Failed to initialize from Base64 env var: {e}", flush=True)
+                    logger.error("Failed to initialize from Base64 env var: %s", e)
 
         # 3. ファイルから認証（ローカル開発用）
         if not service_account_info:
             service_account_file = CONFIG_DIR / "service_account.json"
             if service_account_file.exists():
                 try:
-                    print(f"DEBUG: Found service_account_file at {service_account_file}", flush=True)
+                    logger.debug("Found service_account_file at %s", service_account_file)
                     # ファイルから直接読み込む場合も新しいライブラリを使用
                     credentials = service_account.Credentials.from_service_account_file(
                         str(service_account_file), scopes=SCOPES
                     )
-                    self.client = gspread.authorize(credentials)
-                    print("Google Sheets client initialized successfully (file-based)", flush=True)
+                    self.client = _authorize(credentials)
+                    logger.info("Google Sheets client initialized successfully (file-based)")
                     return
                 except Exception as e:
-                    print(f"Failed to load from file: {e}", flush=True)
+                    logger.error("Failed to load from file: %s", e)
 
         # 認証処理（環境変数からのJSON）
         if service_account_info:
             try:
-                print(f"DEBUG: Attempting auth for: {service_account_info.get('client_email')}", flush=True)
+                logger.debug("Attempting auth for: %s", service_account_info.get('client_email'))
                 
                 # 新しいライブラリ google.oauth2 を使用
                 credentials = service_account.Credentials.from_service_account_info(
                     service_account_info, scopes=SCOPES
                 )
-                self.client = gspread.authorize(credentials)
-                print("Google Sheets client initialized successfully (dict-based)", flush=True)
+                self.client = _authorize(credentials)
+                logger.info("Google Sheets client initialized successfully (dict-based)")
                 return
 
             except Exception as e:
-                print(f"ERROR: Auth failed: {e}", flush=True)
-                import traceback
-                traceback.print_exc()
+                logger.exception("Auth failed: %s", e)
                 self.client = None
         else:
-            print("No service account configuration found")
+            logger.warning("No service account configuration found")
             self.client = None
 
 
@@ -129,23 +148,23 @@ class SheetsService:
         except ImportError:
             from ..utils.mapping_parser import MappingParser
         
-        print(f"DEBUG: Looking for mapping file at: {MAPPING_FILE}", flush=True)
+        logger.debug("Looking for mapping file at: %s", MAPPING_FILE)
         if MAPPING_FILE.exists():
             try:
                 mapping_text = MAPPING_FILE.read_text(encoding='utf-8')
                 self.mapping_dict = MappingParser.parse_mapping(mapping_text)
-                print(f"DEBUG: Loaded mapping.txt with {len(self.mapping_dict)} keys", flush=True)
+                logger.debug("Loaded mapping.txt with %s keys", len(self.mapping_dict))
             except Exception as e:
-                print(f"Failed to load mapping.txt: {e}", flush=True)
+                logger.error("Failed to load mapping.txt: %s", e)
         else:
-            print("DEBUG: mapping.txt NOT FOUND", flush=True)
+            logger.warning("mapping.txt NOT FOUND")
         
         if MAPPING2_FILE.exists():
             try:
                 mapping_text = MAPPING2_FILE.read_text(encoding='utf-8')
                 self.mapping2_dict = MappingParser.parse_mapping(mapping_text)
             except Exception as e:
-                print(f"Failed to load mapping2.txt: {e}")
+                logger.error("Failed to load mapping2.txt: %s", e)
     
     def _flatten_data(self, data: Dict[str, Any], prefix: str = "") -> Dict[str, str]:
         """
@@ -173,37 +192,39 @@ class SheetsService:
     ) -> int:
         """
         マッピング定義に基づいてスプレッドシートにデータを書き込み
+        全セルを values.batchUpdate の1リクエストにまとめて送信する
+        Returns: 書き込んだセル数（バッチ更新に失敗した場合は例外を送出）
         """
-        print(f"DEBUG: write_data called with spreadsheet_id={spreadsheet_id}", flush=True)
-        print(f"DEBUG: client initialized: {self.client is not None}", flush=True)
+        logger.debug("write_data called with spreadsheet_id=%s", spreadsheet_id)
+        logger.debug("client initialized: %s", self.client is not None)
         
         if not self.client:
             raise ValueError("Google Sheets client not initialized")
         
         # マッピング辞書を選択
         mapping = self.mapping_dict if mapping_type == "assessment" else self.mapping2_dict
-        print(f"DEBUG: mapping_type={mapping_type}, mapping loaded: {mapping is not None}", flush=True)
+        logger.debug("mapping_type=%s, mapping loaded: %s", mapping_type, mapping is not None)
         if not mapping:
             raise ValueError(f"Mapping not loaded for type: {mapping_type}")
         
-        print(f"DEBUG: Opening spreadsheet...", flush=True)
+        logger.debug("Opening spreadsheet...")
         try:
             spreadsheet = self.client.open_by_key(spreadsheet_id)
-            print(f"DEBUG: Spreadsheet opened successfully", flush=True)
+            logger.debug("Spreadsheet opened successfully")
         except Exception as e:
-            print(f"ERROR: Failed to open spreadsheet: {type(e).__name__}: {e}", flush=True)
+            logger.error("Failed to open spreadsheet: %s: %s", type(e).__name__, e)
             raise
         
         # シート名が指定されていない場合は最初のシートを使用
-        if sheet_name:
-            worksheet = spreadsheet.worksheet(sheet_name)
-        else:
-            worksheet = spreadsheet.sheet1
+        # （指定時はシート名付きレンジで書き込むため、ワークシート取得のAPI呼び出しは不要）
+        if not sheet_name:
+            sheet_name = spreadsheet.sheet1.title
+        range_prefix = "'{}'!".format(sheet_name.replace("'", "''"))
         
         # データをフラット化
         flat_data = self._flatten_data(data)
-        print(f"DEBUG: Flattened data keys: {list(flat_data.keys())}", flush=True)
-        print(f"DEBUG: Mapping keys (first 10): {list(mapping.keys())[:10]}", flush=True)
+        logger.debug("Flattened data keys: %s", list(flat_data.keys()))
+        logger.debug("Mapping keys (first 10): %s", list(mapping.keys())[:10])
         
         # バッチ更新用のリスト
         cells_to_update = []
@@ -233,28 +254,27 @@ class SheetsService:
                 })
                 written_count += 1
         
-        # バッチ更新（care-dx-appと同じ効率的な方式）
-        print(f"DEBUG: Cells to update: {len(cells_to_update)}", flush=True)
+        # バッチ更新（全セルを1回のHTTPリクエストで送信）
+        # 失敗時に1セルずつ再送するとクォータを大量消費するため、フォールバックは行わない
+        logger.debug("Cells to update: %s", len(cells_to_update))
         if cells_to_update:
-            print(f"DEBUG: First 5 cells: {cells_to_update[:5]}", flush=True)
+            logger.debug("First 5 cells: %s", cells_to_update[:5])
             try:
-                # バッチ更新用のデータ形式に変換
-                updates = [
-                    {'range': cell_data["cell"], 'values': [[cell_data["value"]]]}
-                    for cell_data in cells_to_update
-                ]
-                worksheet.batch_update(updates)
-                print(f"DEBUG: Batch updated {len(updates)} cells successfully", flush=True)
+                body = {
+                    "valueInputOption": "RAW",
+                    "data": [
+                        {"range": f"{range_prefix}{cell_data['cell']}", "values": [[cell_data["value"]]]}
+                        for cell_data in cells_to_update
+                    ]
+                }
+                spreadsheet.values_batch_update(body)
+                logger.debug("Batch updated %s cells successfully", len(cells_to_update))
             except Exception as e:
-                print(f"ERROR: Batch update failed: {e}", flush=True)
-                # フォールバック: 1セルずつ更新
-                for cell_data in cells_to_update:
-                    try:
-                        worksheet.update_acell(cell_data["cell"], cell_data["value"])
-                    except Exception as e2:
-                        print(f"Failed to update cell {cell_data['cell']}: {e2}", flush=True)
+                # 失敗を握りつぶすと呼び出し元が書き込み成功として扱うため、そのまま送出する
+                logger.error("Batch update failed: %s: %s", type(e).__name__, e)
+                raise
         else:
-            print("DEBUG: No cells to update - mapping did not match any data fields", flush=True)
+            logger.debug("No cells to update - mapping did not match any data fields")
         
         return written_count
     
@@ -303,7 +323,7 @@ class SheetsService:
         - 1行目のヘッダーを読み取り、データキーとマッチング
         - 最終行の次に新しい行を追加
         """
-        print(f"DEBUG: write_service_meeting_to_row called", flush=True)
+        logger.debug("write_service_meeting_to_row called")
         
         if not self.client:
             raise ValueError("Google Sheets client not initialized")
@@ -316,15 +336,15 @@ class SheetsService:
             except:
                 # シートがなければ作成
                 worksheet = spreadsheet.add_worksheet(title=sheet_name, rows=100, cols=20)
-                print(f"DEBUG: Created new worksheet: {sheet_name}", flush=True)
+                logger.debug("Created new worksheet: %s", sheet_name)
             
             # 1行目のヘッダーを取得
             headers = worksheet.row_values(1)
             if not headers:
-                print("DEBUG: No headers found, cannot write", flush=True)
+                logger.warning("No headers found, cannot write")
                 return {"success": False, "error": "ヘッダーがありません", "write_count": 0}
             
-            print(f"DEBUG: Headers found: {headers}", flush=True)
+            logger.debug("Headers found: %s", headers)
             
             # データをフラット化
             flat_data = self._flatten_data(data_dict)
@@ -346,7 +366,7 @@ class SheetsService:
             
             # 最終行の次の行に追加
             worksheet.append_row(row_data)
-            print(f"DEBUG: Appended row with {len(row_data)} columns", flush=True)
+            logger.debug("Appended row with %s columns", len(row_data))
             
             return {
                 "success": True,
@@ -355,9 +375,7 @@ class SheetsService:
             }
             
         except Exception as e:
-            print(f"ERROR: write_service_meeting_to_row failed: {e}", flush=True)
-            import traceback
-            traceback.print_exc()
+            logger.exception("write_service_meeting_to_row failed: %s", e)
             return {"success": False, "error": str(e), "write_count": 0}
 
     def write_management_meeting_to_row(
@@ -375,7 +393,7 @@ class SheetsService:
         - ヘッダー: 日時, 開催場所, 参加者, 議題項目, 24時間対応, 共有事項
         - 最終行の次に新しい行を追加
         """
-        print(f"DEBUG: write_management_meeting_to_row called", flush=True)
+        logger.debug("write_management_meeting_to_row called")
         
         if not self.client:
             raise ValueError("Google Sheets client not initialized")
@@ -389,7 +407,7 @@ class SheetsService:
                 # シートがなければ作成してヘッダーを追加
                 worksheet = spreadsheet.add_worksheet(title=sheet_name, rows=100, cols=20)
                 worksheet.append_row(["日時", "開催場所", "参加者", "議題項目", "24時間対応", "共有事項"])
-                print(f"DEBUG: Created new worksheet with headers: {sheet_name}", flush=True)
+                logger.debug("Created new worksheet with headers: %s", sheet_name)
             
             # ヘッダーを読み込む
             headers = worksheet.row_values(1)
@@ -398,7 +416,7 @@ class SheetsService:
                 headers = ["日時", "開催場所", "参加者", "議題項目", "24時間対応", "共有事項"]
                 worksheet.append_row(headers)
             
-            print(f"DEBUG: Headers: {headers}", flush=True)
+            logger.debug("Headers: %s", headers)
             
             # データの準備
             # 日時
@@ -408,7 +426,6 @@ class SheetsService:
             
             # 日付フォーマットの統一 (YYYY年MM月DD日)
             if raw_date:
-                import datetime
                 try:
                     # 既にYYYY-MM-DD形式の場合
                     if "-" in raw_date:
@@ -422,7 +439,7 @@ class SheetsService:
                          dt = datetime.datetime.strptime(clean_date, "%Y/%m/%d")
                          val_date = dt.strftime("%Y年%m月%d日")
                 except Exception as e:
-                    print(f"Date formatting failed for {raw_date}: {e}")
+                    logger.error("Date formatting failed for %s: %s", raw_date, e)
                     # 変換失敗時はそのまま
             
             # 時間があれば後ろに付与する？画像ではA列は日付だけに見えるが、
@@ -464,7 +481,7 @@ class SheetsService:
             
             # 追記実行
             worksheet.append_row(row_data)
-            print(f"DEBUG: Appended management meeting row with {len(row_data)} columns", flush=True)
+            logger.debug("Appended management meeting row with %s columns", len(row_data))
             
             return {
                 "success": True,
@@ -473,9 +490,7 @@ class SheetsService:
             }
             
         except Exception as e:
-            print(f"ERROR: write_management_meeting_to_row failed: {e}", flush=True)
-            import traceback
-            traceback.print_exc()
+            logger.exception("write_management_meeting_to_row failed: %s", e)
             return {"success": False, "error": str(e), "write_count": 0}
 
     def create_and_write_assessment(
@@ -491,11 +506,9 @@ class SheetsService:
         Step 1: 1枚目のシート（基本情報）に mapping.txt で書き込み
         Step 2: 「２．ｱｾｽﾒﾝﾄｼｰﾄ」に mapping2.txt で書き込み
         """
-        print(f"DEBUG: create_and_write_assessment called", flush=True)
-        from .drive_service import drive_service
+        logger.debug("create_and_write_assessment called")
         
         # 1. 新規スプレッドシート作成
-        import datetime
         date_str = datetime.datetime.now().strftime("%Y%m%d")
         
         # 名前を決定（利用者名があれば入れる）
@@ -527,7 +540,7 @@ class SheetsService:
             
             # Step 1: 1枚目のシート（基本情報）
             # sheet_nameが指定されていなければNone（先頭シート）
-            print("DEBUG: Writing Step 1 (Basic Info)...", flush=True)
+            logger.debug("Writing Step 1 (Basic Info)...")
             count1 = self.write_data(
                 spreadsheet_id=new_id,
                 sheet_name=sheet_name, # Noneなら先頭シート
@@ -538,7 +551,7 @@ class SheetsService:
             
             # Step 2: 2枚目のシート（詳細情報）
             # 常に「２．ｱｾｽﾒﾝﾄｼｰﾄ」へ書き込む
-            print("DEBUG: Writing Step 2 (Assessment Detail)...", flush=True)
+            logger.debug("Writing Step 2 (Assessment Detail)...")
             try:
                 count2 = self.write_data(
                     spreadsheet_id=new_id,
@@ -548,7 +561,7 @@ class SheetsService:
                 )
                 total_write_count += count2
             except Exception as e2:
-                print(f"WARNING: Step 2 writing failed: {e2}", flush=True)
+                logger.warning("Step 2 writing failed: %s", e2)
                 # Step 2の失敗は致命的エラーにしない（Step 1が成功していればファイルはできている）
 
             return {
@@ -558,9 +571,7 @@ class SheetsService:
                 "spreadsheet_id": new_id
             }
         except Exception as e:
-            print(f"ERROR: Failed to write to new spreadsheet: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Failed to write to new spreadsheet: %s", e)
             return {"success": False, "error": f"シート作成は成功しましたが書き込みに失敗: {str(e)}", "sheet_url": new_url}
 
     def _to_japanese_calendar(self, date_obj) -> str:
@@ -593,9 +604,7 @@ class SheetsService:
         2. 原本シートのみコピー
         3. 値書き込み（数式上書き）
         """
-        print(f"DEBUG: create_and_write_management_meeting called", flush=True)
-        from .drive_service import drive_service
-        import datetime
+        logger.debug("create_and_write_management_meeting called")
         
         
         # 0. ターゲットフォルダID（ユーザー指定の固定ID）
@@ -617,7 +626,7 @@ class SheetsService:
         new_filename = f"{file_date_str}_運営会議"
         
         # 2. 空のスプレッドシート作成
-        print(f"DEBUG: Creating empty spreadsheet '{new_filename}' in folder {target_folder_id}", flush=True)
+        logger.debug("Creating empty spreadsheet '%s' in folder %s", new_filename, target_folder_id)
         new_id, new_url = drive_service.create_empty_spreadsheet(new_filename, target_folder_id)
         
         if not new_id:
@@ -635,14 +644,14 @@ class SheetsService:
             try:
                 template_sheet = master_ss.worksheet("原本")
             except:
-                print("Error: '原本' sheet not found in master spreadsheet.")
+                logger.error("'原本' sheet not found in master spreadsheet.")
                 return {"success": False, "error": "テンプレートに「原本」シートが見つかりません"}
             
             # 新しいスプレッドシートを開く
             new_ss = self.client.open_by_key(new_id)
             
             # 原本シートを新しいスプレッドシートにコピー
-            print("DEBUG: Copying '原本' sheet to new spreadsheet...", flush=True)
+            logger.debug("Copying '原本' sheet to new spreadsheet...")
             copied_sheet_meta = template_sheet.copy_to(new_id)
             # copy_to はプロパティを返すが、gspreadのバージョンによっては辞書か何か。
             # いずれにせよ、コピーされたシートは「原本 のコピー」などの名前になるはず。
@@ -816,11 +825,11 @@ class SheetsService:
                     }
                 ]
                 new_ss.batch_update({"requests": requests})
-                print(f"DEBUG: cleared data validation for B3", flush=True)
+                logger.debug("cleared data validation for B3")
             except Exception as e_valid:
-                print(f"WARNING: Failed to clear data validation: {e_valid}", flush=True)
+                logger.warning("Failed to clear data validation: %s", e_valid)
 
-            print(f"DEBUG: Successfully populated management meeting sheet: {new_filename}", flush=True)
+            logger.debug("Successfully populated management meeting sheet: %s", new_filename)
 
             return {
                 "success": True,
@@ -830,9 +839,7 @@ class SheetsService:
             }
 
         except Exception as e:
-            print(f"ERROR: Failed to write to management meeting sheet: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Failed to write to management meeting sheet: %s", e)
             return {"success": False, "error": f"シート作成完了、書き込み失敗: {str(e)}", "sheet_url": new_url}
 
     def create_and_write_service_meeting(
@@ -847,10 +854,7 @@ class SheetsService:
         2. 原本「４表（会議録）」のみコピー
         3. 値書き込み（数式上書き・プルダウン解除）
         """
-        print(f"DEBUG: create_and_write_service_meeting called", flush=True)
-        from .drive_service import drive_service
-        import datetime
-        import gspread.utils
+        logger.debug("create_and_write_service_meeting called")
         
         # 0. ターゲットフォルダID（ユーザー指定の固定ID）
         target_folder_id = "1nQ2RhVQPaKCnG6L04yP6rQdcheT230_C"
@@ -882,7 +886,7 @@ class SheetsService:
         new_filename = f"{file_date_str}_会議録{name_suffix}"
         
         # 2. 空のスプレッドシート作成
-        print(f"DEBUG: Creating empty spreadsheet '{new_filename}' in folder {target_folder_id}", flush=True)
+        logger.debug("Creating empty spreadsheet '%s' in folder %s", new_filename, target_folder_id)
         new_id, new_url = drive_service.create_empty_spreadsheet(new_filename, target_folder_id)
         
         if not new_id:
@@ -899,14 +903,14 @@ class SheetsService:
             try:
                 template_sheet = master_ss.worksheet("４表（会議録）")
             except:
-                print("Error: '４表（会議録）' sheet not found in master spreadsheet.")
+                logger.error("'４表（会議録）' sheet not found in master spreadsheet.")
                 return {"success": False, "error": "テンプレートに「４表（会議録）」シートが見つかりません"}
             
             # 新しいスプレッドシートを開く
             new_ss = self.client.open_by_key(new_id)
             
             # テンプレートシートを新しいスプレッドシートにコピー
-            print("DEBUG: Copying '４表（会議録）' sheet to new spreadsheet...", flush=True)
+            logger.debug("Copying '４表（会議録）' sheet to new spreadsheet...")
             template_sheet.copy_to(new_id)
             
             # 新しいスプレッドシートのシート一覧を取得 Refresh
@@ -997,10 +1001,10 @@ class SheetsService:
                 requests.append(request)
             
             if requests:
-                print("DEBUG: Clearing data validations...", flush=True)
+                logger.debug("Clearing data validations...")
                 new_ss.batch_update({"requests": requests})
 
-            print(f"DEBUG: Successfully populated service meeting sheet: {new_filename}", flush=True)
+            logger.debug("Successfully populated service meeting sheet: %s", new_filename)
             
             return {
                 "success": True,
@@ -1010,7 +1014,5 @@ class SheetsService:
             }
             
         except Exception as e:
-            print(f"ERROR: create_and_write_service_meeting failed: {e}", flush=True)
-            import traceback
-            traceback.print_exc()
+            logger.exception("create_and_write_service_meeting failed: %s", e)
             return {"success": False, "error": str(e), "sheet_url": new_url}
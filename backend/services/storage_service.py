@@ -2,11 +2,45 @@
 Storage Service - Cloudflare R2統合
 """
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 import os
 import uuid
+import asyncio
+import orjson
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, BinaryIO
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+# マルチパートアップロード設定（8MB単位でストリーミング転送）
+# 同時に送信するパート数を絞り、1アップロードあたりのメモリを約 8MB × 4 に抑える
+# （既定の max_concurrency=10 だと 80MB をバッファし、送信スレッドも10本立つ）
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_MAX_CONCURRENCY = 4
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=UPLOAD_CHUNK_SIZE,
+    multipart_chunksize=UPLOAD_CHUNK_SIZE,
+    max_concurrency=UPLOAD_MAX_CONCURRENCY,
+    use_threads=True
+)
+
+# 全リクエストで1つのクライアントを共有するため、接続プールを大きめに確保
+# tcp_keepalive: アイドル中のプール接続が中間機器に切断されず、次の要求でTLS再接続しないようにする
+CLIENT_CONFIG = Config(
+    signature_version="s3v4",
+    max_pool_connections=64,
+    tcp_keepalive=True,
+    retries={"max_attempts": 3, "mode": "adaptive"}
+)
+
+# 下書きJSONはzstdで圧縮して保存（繰り返しの多い構造のため転送量が大きく減る）
+# zstandard が未インストールの環境では非圧縮のまま保存する
+ZSTD_LEVEL = 3
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
 
 
 class StorageService:
@@ -17,12 +51,12 @@ class StorageService:
         self.bucket_name = os.getenv("R2_BUCKET_NAME", "kakanai-uploads")
         
         if self.account_id and self.access_key_id and self.secret_access_key:
-            self.s3_client = boto3.client(
+            self.s3_client = boto3.session.Session().client(
                 "s3",
                 endpoint_url=f"https://{self.account_id}.r2.cloudflarestorage.com",
                 aws_access_key_id=self.access_key_id,
                 aws_secret_access_key=self.secret_access_key,
-                config=Config(signature_version="s3v4"),
+                config=CLIENT_CONFIG,
                 region_name="auto"
             )
         else:
@@ -57,9 +91,10 @@ class StorageService:
             "file_key": file_key
         }
     
-    def upload_file(self, file_data: bytes, filename: str, content_type: str) -> str:
+    def upload_file(self, file_obj: BinaryIO, filename: str, content_type: str) -> str:
         """
         バックエンド経由でR2にファイルをアップロード
+        file_obj はファイルライクオブジェクト（全体をメモリに読み込まずチャンク転送）
         """
         if not self.s3_client:
             raise ValueError("R2 credentials not configured")
@@ -70,12 +105,13 @@ class StorageService:
         ext = filename.split(".")[-1] if "." in filename else ""
         file_key = f"uploads/{timestamp}_{unique_id}.{ext}"
         
-        # R2にアップロード
-        self.s3_client.put_object(
-            Bucket=self.bucket_name,
-            Key=file_key,
-            Body=file_data,
-            ContentType=content_type
+        # R2にアップロード（ストリーミング）
+        self.s3_client.upload_fileobj(
+            file_obj,
+            self.bucket_name,
+            file_key,
+            ExtraArgs={"ContentType": content_type},
+            Config=TRANSFER_CONFIG
         )
         
         return file_key
@@ -92,7 +128,54 @@ class StorageService:
             Key=file_key
         )
         return response["Body"].read()
+
+    async def get_file_async(self, file_key: str) -> bytes:
+        """
+        R2からファイルを取得（async版）
+        共有クライアントの接続プールを使い、スレッドで実行してイベントループを塞がない
+        """
+        return await asyncio.to_thread(self.get_file, file_key)
     
+    def save_draft(self, draft_id: str, data: Any) -> str:
+        """
+        下書きデータ（Genogram/BodyMap）をJSONとして drafts/{id}.json に保存
+        orjsonで直接UTF-8のbytesにシリアライズし、zstdが使えれば圧縮する
+        """
+        if not self.s3_client:
+            raise ValueError("R2 credentials not configured")
+
+        key = f"drafts/{draft_id}.json"
+        body = orjson.dumps(data)
+        extra_args = {}
+        if zstd:
+            body = zstd.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+            extra_args["ContentEncoding"] = "zstd"
+
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=key,
+            Body=body,
+            ContentType="application/json",
+            **extra_args
+        )
+        return key
+
+    def get_draft(self, draft_id: str) -> bytes:
+        """
+        下書きデータのJSON(bytes)を取得
+        zstd圧縮されていれば展開する（圧縮導入前の非圧縮の下書きもそのまま返す）
+        """
+        data = self.get_file(f"drafts/{draft_id}.json")
+        if data.startswith(ZSTD_MAGIC):
+            if not zstd:
+                raise ValueError("zstandard is required to read compressed drafts")
+            data = zstd.ZstdDecompressor().decompress(data)
+        return data
+
+    async def get_draft_async(self, draft_id: str) -> bytes:
+        """下書きデータを取得（async版）"""
+        return await asyncio.to_thread(self.get_draft, draft_id)
+
     def delete_file(self, file_key: str) -> bool:
         """
         R2からファイルを削除
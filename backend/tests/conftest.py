@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# backend/ をimportパスに追加（main.py と同じく services.* / utils.* で読み込む）
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,95 @@
+import asyncio
+
+import google.generativeai as genai
+import pytest
+
+from services import ai_service
+from services.ai_service import AIService, PartialAssessmentError
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class _AsyncModel:
+    """generate_content_async がコルーチンを返すスタブ（grpc_asyncioトランスポート相当）"""
+
+    def __init__(self, texts):
+        self._texts = list(texts)
+        self.calls = []
+
+    async def generate_content_async(self, prompt_parts):
+        self.calls.append(list(prompt_parts))
+        return _Response(self._texts.pop(0))
+
+
+def _service(monkeypatch, model):
+    configured = {}
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(genai, "configure", lambda **kwargs: configured.update(kwargs))
+    service = AIService()
+    service._model = model
+    return service, configured
+
+
+def test_configure_keeps_default_async_transport(monkeypatch):
+    _, configured = _service(monkeypatch, _AsyncModel([]))
+    assert configured == {"api_key": "test-key"}
+
+
+def test_generate_json_async_awaits_client(monkeypatch):
+    model = _AsyncModel(['{"氏名": "山田"}'])
+    service, _ = _service(monkeypatch, model)
+
+    result = asyncio.run(service._generate_json_async(["prompt"], expect_dict=True))
+
+    assert result == {"氏名": "山田"}
+    assert model.calls == [["prompt"]]
+
+
+def test_generate_json_async_reprompts_invalid_json(monkeypatch):
+    model = _AsyncModel(["not json", '[{"a": 1}]'])
+    service, _ = _service(monkeypatch, model)
+
+    result = asyncio.run(service._generate_json_async(["prompt"], expect_dict=True))
+
+    assert result == {"a": 1}
+    assert model.calls[1] == ["prompt", ai_service.VALID_JSON_REMINDER]
+
+
+def _assessment_service(monkeypatch, phase_results):
+    """フェーズごとの結果（dict または例外）を返すようにスタブしたAIService"""
+    service, _ = _service(monkeypatch, _AsyncModel([]))
+    phases = [(i + 1, f"phase{i + 1}", 1, f"prompt{i + 1}") for i in range(len(phase_results))]
+    outcomes = dict(zip((prompt for *_, prompt in phases), phase_results))
+
+    async def fake_generate(prompt_parts, expect_dict=False):
+        outcome = outcomes[prompt_parts[-1]]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(service, "_get_assessment_phase_prompts", lambda: phases)
+    monkeypatch.setattr(service, "_upload_files_to_gemini", lambda file_contents: ["file"])
+    monkeypatch.setattr(service, "_cleanup_files", lambda uploaded_files: None)
+    monkeypatch.setattr(service, "_generate_json_async", fake_generate)
+    return service
+
+
+def test_extract_assessment_info_merges_all_phases(monkeypatch):
+    service = _assessment_service(monkeypatch, [{"a": 1}, {"b": 2}])
+
+    result = asyncio.run(service.extract_assessment_info([(b"data", "application/pdf")]))
+
+    assert result == {"a": 1, "b": 2}
+
+
+def test_extract_assessment_info_reports_failed_phases(monkeypatch):
+    service = _assessment_service(monkeypatch, [{"a": 1}, ValueError("bad json"), {"c": 3}])
+
+    with pytest.raises(PartialAssessmentError) as excinfo:
+        asyncio.run(service.extract_assessment_info([(b"data", "application/pdf")]))
+
+    assert excinfo.value.result == {"a": 1, "c": 3}
+    assert excinfo.value.failed_phases == [2]
@@ -0,0 +1,74 @@
+import asyncio
+import os
+import stat
+
+import pytest
+
+from services import llm_cache as llm_cache_module
+from services.llm_cache import LLMCache, make_cache_key
+
+
+@pytest.fixture
+def disk_cache(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "true")
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setattr(llm_cache_module, "CACHE_DIR", tmp_path / "cache")
+    return LLMCache()
+
+
+def test_make_cache_key_is_stable_and_type_agnostic():
+    assert make_cache_key("model", b"data") == make_cache_key(b"model", "data")
+    assert len(make_cache_key("a")) == 64
+
+
+def test_make_cache_key_separates_part_boundaries():
+    assert make_cache_key("ab", "c") != make_cache_key("a", "bc")
+    assert make_cache_key("a") != make_cache_key("a", "")
+
+
+def test_disk_cache_round_trip(disk_cache):
+    asyncio.run(disk_cache.set("key", {"氏名": "山田"}))
+
+    assert asyncio.run(disk_cache.get("key")) == {"氏名": "山田"}
+    assert asyncio.run(disk_cache.get("missing")) is None
+
+
+def test_disk_cache_expires_entries(disk_cache):
+    asyncio.run(disk_cache.set("key", {"a": 1}, ttl=-1))
+
+    assert asyncio.run(disk_cache.get("key")) is None
+    assert not disk_cache._disk_path("key").exists()
+
+
+def test_disk_cache_is_private_to_owner(disk_cache):
+    asyncio.run(disk_cache.set("key", {"a": 1}))
+
+    assert stat.S_IMODE(os.stat(llm_cache_module.CACHE_DIR).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(disk_cache._disk_path("key")).st_mode) == 0o600
+
+
+def test_disabled_cache_skips_disk(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+    monkeypatch.setattr(llm_cache_module, "CACHE_DIR", tmp_path / "cache")
+    cache = LLMCache()
+
+    asyncio.run(cache.set("key", {"a": 1}))
+
+    assert asyncio.run(cache.get("key")) is None
+    assert not (tmp_path / "cache").exists()
+
+
+def test_disk_cache_prunes_least_recently_used(monkeypatch, disk_cache):
+    monkeypatch.setattr(llm_cache_module, "CACHE_MAX_ENTRIES", 2)
+    asyncio.run(disk_cache.set("old", 1))
+    asyncio.run(disk_cache.set("used", 2))
+    # "old" を古く、"used" を最近使ったことにする
+    os.utime(disk_cache._disk_path("old"), (1, 1))
+    os.utime(disk_cache._disk_path("used"), (2, 2))
+    assert asyncio.run(disk_cache.get("used")) == 2
+
+    asyncio.run(disk_cache.set("new", 3))
+
+    assert asyncio.run(disk_cache.get("old")) is None
+    assert asyncio.run(disk_cache.get("used")) == 2
+    assert asyncio.run(disk_cache.get("new")) == 3
@@ -0,0 +1,160 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+import main
+from services.ai_service import PartialAssessmentError
+
+
+class _MemoryCache:
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})
+
+    async def get(self, key):
+        return self.entries.get(key)
+
+    async def set(self, key, value, ttl=None):
+        self.entries[key] = value
+
+
+FILES = [(b"audio-bytes", "audio/mp4")]
+
+
+def _stub_assessment(monkeypatch, outcome):
+    cache = _MemoryCache()
+    monkeypatch.setattr(main, "llm_cache", cache)
+
+    async def fake_extract(file_contents):
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(main, "ai_service", SimpleNamespace(model_name="test-model", extract_assessment_info=fake_extract))
+    return cache
+
+
+def test_run_cached_analysis_caches_complete_result(monkeypatch):
+    cache = _stub_assessment(monkeypatch, {"氏名": "山田"})
+
+    assert asyncio.run(main._run_cached_analysis("assessment", FILES)) == ({"氏名": "山田"}, "MISS")
+    assert list(cache.entries.values()) == [{"氏名": "山田"}]
+    assert asyncio.run(main._run_cached_analysis("assessment", FILES)) == ({"氏名": "山田"}, "HIT")
+
+
+def test_run_cached_analysis_does_not_cache_partial_assessment(monkeypatch):
+    cache = _stub_assessment(monkeypatch, PartialAssessmentError({"氏名": "山田"}, [3]))
+
+    assert asyncio.run(main._run_cached_analysis("assessment", FILES)) == ({"氏名": "山田"}, "MISS")
+    assert cache.entries == {}
+
+
+def test_run_cached_analysis_raises_when_every_phase_failed(monkeypatch):
+    cache = _stub_assessment(monkeypatch, PartialAssessmentError({}, [1, 2]))
+
+    with pytest.raises(PartialAssessmentError):
+        asyncio.run(main._run_cached_analysis("assessment", FILES))
+    assert cache.entries == {}
+
+
+def test_busy_gemini_returns_503_with_analyze_body(monkeypatch):
+    monkeypatch.setattr(main, "GEMINI_QUEUE_TIMEOUT", 0.01)
+    monkeypatch.setattr(main, "llm_cache", _MemoryCache())
+    unreachable = lambda text: pytest.fail("Gemini must not be called while busy")
+    monkeypatch.setattr(main, "ai_service", SimpleNamespace(
+        model_name="test-model", generate_genogram_data=unreachable, generate_bodymap_data=unreachable
+    ))
+
+    for route in (main.generate_genogram, main.generate_bodymap):
+        # 空きのない枠（イベントループごとに作り直す）
+        monkeypatch.setattr(main, "gemini_semaphore", asyncio.Semaphore(0))
+        response = asyncio.run(route(SimpleNamespace(text="家族構成")))
+
+        assert response.status_code == 503
+        body = orjson.loads(response.body)
+        assert body["success"] is False
+        assert body["error"] == "AI analysis is busy. Please retry later."
+
+
+def _run_size_limit(content_length):
+    """UploadSizeLimitMiddleware に1リクエスト通し、(下流アプリが呼ばれたか, 送信メッセージ) を返す"""
+    called = []
+    sent = []
+
+    async def downstream(scope, receive, send):
+        called.append(scope["path"])
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = main.UploadSizeLimitMiddleware(downstream, max_bytes=100)
+    headers = [(b"content-type", b"multipart/form-data")]
+    if content_length is not None:
+        headers.append((b"content-length", content_length))
+    scope = {"type": "http", "method": "POST", "path": "/api/analyze/direct", "headers": headers}
+    asyncio.run(middleware(scope, receive, send))
+    return bool(called), sent
+
+
+def test_upload_size_limit_rejects_oversize_body_with_analyze_body():
+    called, sent = _run_size_limit(b"101")
+
+    assert not called
+    assert sent[0]["status"] == 413
+    body = orjson.loads(sent[1]["body"])
+    assert body["success"] is False
+    assert body["error"] == "Upload too large (max 100 bytes)"
+
+
+@pytest.mark.parametrize("content_length", [b"100", b"abc", None])
+def test_upload_size_limit_passes_other_requests(content_length):
+    called, sent = _run_size_limit(content_length)
+
+    assert called
+    assert sent == []
+
+
+def test_prompt_version_tracks_prompts_not_other_code(monkeypatch):
+    from services import ai_service
+
+    version = main._prompt_version()
+    assert main._prompt_version() == version
+
+    monkeypatch.setattr(ai_service, "UPLOAD_HTTP_TIMEOUT", 1)
+    assert main._prompt_version() == version
+
+    monkeypatch.setattr(ai_service, "QA_PROMPT", ai_service.QA_PROMPT + "追加の指示")
+    assert main._prompt_version() != version
+
+
+def test_sync_analysis_keeps_slot_until_thread_finishes(monkeypatch):
+    """キャンセルされてもスレッドが終わるまでGemini枠を解放しない"""
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking_analysis(file_contents):
+        started.set()
+        release.wait(5)
+        return {"done": True}
+
+    async def scenario():
+        semaphore = asyncio.Semaphore(1)
+        monkeypatch.setattr(main, "gemini_semaphore", semaphore)
+        caller = asyncio.create_task(main.run_in_gemini_slot(blocking_analysis, FILES))
+        await asyncio.to_thread(started.wait, 5)
+
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        # スレッドはまだ実行中のため枠は埋まったまま
+        assert semaphore.locked()
+
+        release.set()
+        await asyncio.wait_for(semaphore.acquire(), timeout=5)
+
+    asyncio.run(scenario())
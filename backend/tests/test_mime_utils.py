@@ -0,0 +1,58 @@
+import mimetypes
+
+import pytest
+
+from utils.mime_utils import guess_mime, resolve_mime, sniff_mime
+
+
+def _ftyp(brand: bytes) -> bytes:
+    return b"\x00\x00\x00\x20ftyp" + brand + b"\x00\x00\x00\x00"
+
+
+@pytest.mark.parametrize("content, expected", [
+    (b"%PDF-1.7\n", "application/pdf"),
+    (b"\xff\xd8\xff\xe0\x00\x10JFIF", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n\x00\x00", "image/png"),
+    (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "image/webp"),
+    (b"RIFF\x00\x00\x00\x00WAVEfmt ", "audio/wav"),
+    (_ftyp(b"M4A "), "audio/mp4"),
+    (_ftyp(b"heic"), "image/heic"),
+    (_ftyp(b"heix"), "image/heic"),
+    (_ftyp(b"mif1"), "image/heif"),
+    (_ftyp(b"msf1"), "image/heif"),
+    (_ftyp(b"isom"), "video/mp4"),
+    (_ftyp(b"mp42"), "video/mp4"),
+    (b"ID3\x04\x00", "audio/mpeg"),
+    (b"\xff\xfb\x90\x00", "audio/mpeg"),
+    (b"OggS\x00\x02", "audio/ogg"),
+    (b"\x1a\x45\xdf\xa3\x01", "audio/webm"),
+    (b"plain text", None),
+    (b"", None),
+])
+def test_sniff_mime(content, expected):
+    assert sniff_mime(content) == expected
+
+
+def test_resolve_mime_prefers_explicit_content_type():
+    assert resolve_mime("image/png", "photo.jpg", b"%PDF") == "image/png"
+
+
+def test_resolve_mime_uses_extension_for_octet_stream():
+    assert resolve_mime("application/octet-stream", "memo.M4A", b"%PDF") == "audio/mp4"
+
+
+def test_resolve_mime_sniffs_extensionless_upload():
+    assert resolve_mime("application/octet-stream", "IMG_0001", _ftyp(b"heic"), default="image/jpeg") == "image/heic"
+
+
+def test_resolve_mime_falls_back_to_default():
+    assert resolve_mime(None, "upload.bin", b"unknown", default="image/jpeg") == "image/jpeg"
+    assert resolve_mime(None, None, b"unknown") == "application/octet-stream"
+
+
+def test_guess_mime_overrides_stay_local():
+    assert guess_mime("recording.mp4") == "audio/mp4"
+    assert guess_mime("notes.txt") == "text/plain"
+    assert guess_mime("archive.bin") is None
+    # プロセス全体の mimetypes の結果は変えない
+    assert mimetypes.guess_type("x.mp4")[0] == "video/mp4"
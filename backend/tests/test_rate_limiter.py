@@ -0,0 +1,84 @@
+import pytest
+
+from services import ai_service
+from services.ai_service import RateLimiter
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(ai_service.time, "monotonic", clock)
+    return clock
+
+
+def test_reserve_allows_burst_then_spaces_calls(clock):
+    limiter = RateLimiter(rpm=60, burst=3)
+
+    assert [limiter._reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # バケットが空: 1秒に1トークン（60rpm）ずつ補充される
+    assert limiter._reserve() == pytest.approx(1.0)
+    assert limiter._reserve() == pytest.approx(2.0)
+
+
+def test_reserve_refills_over_time_up_to_capacity(clock):
+    limiter = RateLimiter(rpm=60, burst=2)
+    limiter._reserve()
+    limiter._reserve()
+
+    clock.now += 1.5
+    assert limiter._reserve() == 0.0
+    # 長く空いてもバースト上限までしか貯まらない
+    clock.now += 100
+    assert [limiter._reserve() for _ in range(2)] == [0.0, 0.0]
+    assert limiter._reserve() > 0
+
+
+def test_rate_limited_halves_rate_down_to_floor(clock):
+    limiter = RateLimiter(rpm=60, burst=1)
+
+    limiter.on_rate_limited()
+    assert limiter.rate == pytest.approx(0.5)
+    for _ in range(10):
+        limiter.on_rate_limited()
+    assert limiter.rate == pytest.approx(limiter.max_rate / 8)
+
+
+def test_success_recovers_rate_additively_up_to_max(clock):
+    limiter = RateLimiter(rpm=60, burst=1)
+    limiter.on_rate_limited()
+
+    limiter.on_success()
+    assert limiter.rate == pytest.approx(0.5 + 1 / 20)
+    for _ in range(20):
+        limiter.on_success()
+    assert limiter.rate == pytest.approx(limiter.max_rate)
+
+
+def test_reserve_waits_longer_after_rate_limit(clock):
+    limiter = RateLimiter(rpm=60, burst=1)
+    limiter._reserve()
+
+    limiter.on_rate_limited()
+
+    assert limiter._reserve() == pytest.approx(2.0)
+
+
+def test_retry_delay_prefers_server_hint():
+    assert ai_service._retry_delay("429 Quota exceeded. Please retry in 12.5s.", attempt=0) == pytest.approx(13.5)
+
+
+@pytest.mark.parametrize("attempt, base", [(0, 4.0), (1, 8.0), (2, 16.0), (3, 30.0), (6, 30.0)])
+def test_retry_delay_backs_off_with_proportional_jitter(monkeypatch, attempt, base):
+    monkeypatch.setattr(ai_service.random, "random", lambda: 0.0)
+    assert ai_service._retry_delay("429 Resource exhausted", attempt) == pytest.approx(base)
+
+    monkeypatch.setattr(ai_service.random, "random", lambda: 1.0)
+    assert ai_service._retry_delay("429 Resource exhausted", attempt) == pytest.approx(base * (1 + ai_service.RETRY_JITTER))
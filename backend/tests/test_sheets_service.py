@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import pytest
+
+from services.sheets_service import SheetsService
+
+
+class _Spreadsheet:
+    def __init__(self, error=None):
+        self.sheet1 = SimpleNamespace(title="表紙")
+        self.bodies = []
+        self._error = error
+
+    def values_batch_update(self, body):
+        if self._error:
+            raise self._error
+        self.bodies.append(body)
+
+
+def _service(spreadsheet, mapping):
+    # 認証・マッピング読み込みを行わずに生成する
+    service = SheetsService.__new__(SheetsService)
+    service.client = SimpleNamespace(open_by_key=lambda spreadsheet_id: spreadsheet)
+    service.mapping_dict = mapping
+    service.mapping2_dict = None
+    return service
+
+
+MAPPING = {
+    "氏名": {"cell": "B2"},
+    "住所": {"cell": "B3"},
+    "電話番号": {"cell": "B4"},
+    "備考": {},
+}
+
+
+def test_write_data_sends_one_batch_update():
+    spreadsheet = _Spreadsheet()
+    service = _service(spreadsheet, MAPPING)
+    data = {"基本情報": {"氏名": "山田", "住所": "東京都"}, "電話番号": "（空白）", "備考": "なし"}
+
+    written = service.write_data("sheet-id", "アセスメント", data)
+
+    assert written == 2
+    assert spreadsheet.bodies == [{
+        "valueInputOption": "RAW",
+        "data": [
+            {"range": "'アセスメント'!B2", "values": [["山田"]]},
+            {"range": "'アセスメント'!B3", "values": [["東京都"]]},
+        ],
+    }]
+
+
+def test_write_data_quotes_sheet_names():
+    spreadsheet = _Spreadsheet()
+    service = _service(spreadsheet, MAPPING)
+
+    service.write_data("sheet-id", "Bob's sheet", {"氏名": "山田"})
+
+    assert spreadsheet.bodies[0]["data"][0]["range"] == "'Bob''s sheet'!B2"
+
+
+def test_write_data_defaults_to_first_sheet():
+    spreadsheet = _Spreadsheet()
+    service = _service(spreadsheet, MAPPING)
+
+    service.write_data("sheet-id", "", {"氏名": "山田"})
+
+    assert spreadsheet.bodies[0]["data"][0]["range"] == "'表紙'!B2"
+
+
+def test_write_data_skips_request_without_matches():
+    spreadsheet = _Spreadsheet()
+    service = _service(spreadsheet, MAPPING)
+
+    assert service.write_data("sheet-id", "アセスメント", {"無関係": "値"}) == 0
+    assert spreadsheet.bodies == []
+
+
+def test_write_data_raises_when_batch_update_fails():
+    service = _service(_Spreadsheet(error=RuntimeError("Unable to parse range")), MAPPING)
+
+    with pytest.raises(RuntimeError):
+        service.write_data("sheet-id", "存在しないシート", {"氏名": "山田"})
@@ -0,0 +1,43 @@
+"""
+ロギング設定
+ハンドラへの書き込みはQueueListenerのバックグラウンドスレッドで行い、
+リクエスト処理側はキューへの追加のみ（stdoutロック待ちをしない）
+"""
+import os
+import sys
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging() -> QueueListener:
+    """ルートロガーにQueueHandlerを設定し、stderr出力用のリスナーを起動（多重呼び出し可）"""
+    global _listener
+    if _listener:
+        return _listener
+
+    log_queue = queue.Queue(-1)
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """キューに残ったログを書き出してリスナーを停止"""
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
@@ -2,6 +2,11 @@
 import re
 from typing import Dict, Any, List
 
+# セル番地（A-Zの列番号 + 数字の行番号）、全角括弧内の選択肢、選択肢の区切り
+_CELL_RE = re.compile(r'([A-Z]+\d+)')
+_OPTIONS_RE = re.compile(r'（(.+?)）')
+_OPTION_SEP_RE = re.compile(r'[、,]')
+
 class MappingParser:
     @staticmethod
     def parse_mapping(mapping_text: str) -> Dict[str, Dict[str, Any]]:
@@ -38,7 +43,7 @@ class MappingParser:
                     
                     # セル番地と選択肢を分離
                     # A-Zの列番号 + 数字の行番号 にマッチ
-                    cell_match = re.search(r'([A-Z]+\d+)', cell_and_options)
+                    cell_match = _CELL_RE.search(cell_and_options)
                     if cell_match:
                         cell = cell_match.group(1)
                         options = []
@@ -46,19 +51,19 @@ class MappingParser:
                         # 同一行にある選択肢の解析 (e.g. "X13（来所、電話、他）")
                         # cellの後ろにある括弧を探す
                         options_part = cell_and_options[cell_match.end():]
-                        options_match = re.search(r'（(.+?)）', options_part)
+                        options_match = _OPTIONS_RE.search(options_part)
                         
                         if options_match:
                             options_str = options_match.group(1)
                             # 句読点や全角スペースで区切られている場合のハンドリング強化
-                            options = [opt.strip() for opt in re.split(r'[、,]', options_str) if opt.strip()]
+                            options = [opt.strip() for opt in _OPTION_SEP_RE.split(options_str) if opt.strip()]
                         
                         # 次の行に選択肢がある場合もチェック (care-dx-appのロジック準拠)
                         if not options and i + 1 < len(lines):
                             next_line = lines[i + 1].strip()
                             if next_line.startswith('（') and next_line.endswith('）'):
                                 options_str = next_line[1:-1]
-                                options = [opt.strip() for opt in re.split(r'[、,]', options_str) if opt.strip()]
+                                options = [opt.strip() for opt in _OPTION_SEP_RE.split(options_str) if opt.strip()]
                                 i += 1 # 次の行を処理したのでスキップ
                         
                         mapping_dict[item_name] = {
@@ -0,0 +1,79 @@
+"""
+MIMEタイプ判定ユーティリティ
+ブラウザが application/octet-stream を送ってきた場合やR2キーからの推測に使用
+"""
+import os
+import mimetypes
+from typing import Optional
+
+DEFAULT_MIME = "application/octet-stream"
+
+# 拡張子 → MIMEタイプ
+# Geminiに渡す形式を優先する上書き分。それ以外の拡張子は mimetypes で推測
+# （mimetypes のレジストリには登録しない: プロセス全体の guess_type の結果を変えてしまうため）
+EXT_TO_MIME = {
+    ".pdf": "application/pdf",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".m4a": "audio/mp4",
+    ".mp4": "audio/mp4",
+    ".mp3": "audio/mpeg",
+    ".wav": "audio/wav",
+}
+
+# ISO-BMFF の ftyp ボックスのメジャーブランド → MIMEタイプ（該当なしは video/mp4）
+_FTYP_BRAND_TO_MIME = {
+    b"M4A ": "audio/mp4",
+    b"heic": "image/heic",
+    b"heix": "image/heic",
+    b"mif1": "image/heif",
+    b"msf1": "image/heif",
+}
+
+
+def guess_mime(filename: Optional[str]) -> Optional[str]:
+    """ファイル名（R2キー含む）の拡張子からMIMEタイプを推測（.bin等の汎用型は判定不能扱い）"""
+    if not filename:
+        return None
+    # よく使う拡張子は1回のdict参照で確定（mimetypes はURL解析や大文字小文字の再試行を挟むため後回し）
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in EXT_TO_MIME:
+        return EXT_TO_MIME[ext]
+    mime_type = mimetypes.guess_type(filename)[0]
+    return mime_type if mime_type != DEFAULT_MIME else None
+
+
+def sniff_mime(content: bytes) -> Optional[str]:
+    """
+    先頭バイト（マジックナンバー）からMIMEタイプを判定
+    読み込み済みのbytesの先頭のみ参照する
+    """
+    head = content[:16]
+    if head.startswith(b"%PDF"):
+        return "application/pdf"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head.startswith(b"RIFF") and head[8:12] == b"WAVE":
+        return "audio/wav"
+    if head[4:8] == b"ftyp":
+        # ISO-BMFF（MP4系）はメジャーブランドで音声・写真(HEIC/HEIF)・動画を区別する
+        return _FTYP_BRAND_TO_MIME.get(head[8:12], "video/mp4")
+    if head.startswith(b"ID3") or head[:2] in (b"\xff\xfb", b"\xff\xf3", b"\xff\xf2"):
+        return "audio/mpeg"
+    if head.startswith(b"OggS"):
+        return "audio/ogg"
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "audio/webm"
+    return None
+
+
+def resolve_mime(content_type: Optional[str], filename: Optional[str], content: bytes, default: str = DEFAULT_MIME) -> str:
+    """Content-Type → 拡張子 → マジックナンバーの順でMIMEタイプを決定"""
+    if content_type and content_type != DEFAULT_MIME:
+        return content_type
+    return guess_mime(filename) or sniff_mime(content) or default
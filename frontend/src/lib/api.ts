@@ -64,6 +64,8 @@ export async function uploadToR2(
 
 /**
  * Upload file through backend proxy (bypasses CORS issues)
+ * @deprecated Use getPresignedUrl + uploadToR2. The backend returns 410
+ * unless ENABLE_DIRECT_UPLOAD is set.
  */
 export async function uploadFileDirect(
     file: File